@@ -1,6 +1,16 @@
+import threading
+from types import SimpleNamespace
+
 import streamlit as st
 from footer import footer
+from instrumentation import start_exporters, timer
 from utils import *
+from game_engine import grade_response, is_game_over, record_answer, reset_score, score_line
+from leaderboard import get_leaderboard, new_game_id
+from dedup_index import DedupIndex
+from question_pool import get_question_pool
+from search_index import get_search_index
+from tasks import PENDING, collect, get_task, get_task_runner, rerun_while_pending, submit
 
 
 def init(totq: int = 6, 
@@ -12,25 +22,52 @@ def init(totq: int = 6,
         st.session_state.start = 0  
         # Distinguish between a brand new session and restart
         st.session_state.input = 0
-        # Track number of points scored in a game
-        st.session_state.points = 0
-        # Track total number of questions received in a game
-        st.session_state.nq = 0
-        # Track number of questions answered correctly in a game
-        st.session_state.answered = 0
+        # Track points, questions received and questions answered correctly in a game
+        reset_score(st.session_state)
         st.session_state.contestant = contestant
         st.session_state.source = source
-
+        # Clues already asked in this game, so generated questions don't repeat
+        st.session_state.served = DedupIndex()
+        # Groups this game's events in the leaderboard history
+        st.session_state.game_id = new_game_id()
+
+    if 'clues' not in st.session_state:
+        # The archive clue queue (and the scheduler's pick), owned by the fetch task;
+        # a replaced fetch may still be running, so fetches take turns
+        st.session_state.clues = SimpleNamespace(lock=threading.Lock())
     st.session_state.contestant = contestant
     st.session_state.source = source
     st.session_state.start = 0
-    if st.session_state.source == "JArchive":
-        st.session_state.question = generate_question_from_archive(None, None)
-    else:
-        st.session_state.question = generate_question_from_chatgpt(None, None)
+    # Fetched in the background; main() shows it once it arrives
+    st.session_state.pop('question', None)
+    adaptive = bool(st.session_state.get("adaptive"))
+    typed = st.session_state.get("category_query", "").strip()
+    submit(st.session_state, "question",
+           (st.session_state.game_id, st.session_state.nq, source, adaptive, typed),
+           fetch_question, source, st.session_state.clues, st.session_state.served,
+           f"contestant:{contestant}", totq, adaptive, typed)
     st.session_state.totq = totq
 
 
+def fetch_question(source, clues, served, subject, totq, adaptive, typed):
+    """Gets the next question.  Runs as a background task, so it is handed plain objects."""
+    if source != "JArchive":
+        return get_question_pool().get(None, None, served)
+    category = None if adaptive else category_filter(typed)
+    with clues.lock:
+        if adaptive:
+            return next_scheduled_question(clues, subject, totq)
+        return next_question_from_archive(clues, totq, category=category)
+
+
+def category_filter(typed):
+    """The archive category the typed category prefix completes to, if any."""
+    if not typed:
+        return None
+    completions = get_search_index().complete_category(typed, limit=1)
+    return completions[0] if completions else None
+
+
 def restart():
     init(st.session_state.totq,
          st.session_state.contestant,
@@ -48,7 +85,7 @@ def main():
     st.write(f"##### **Question Source: {st.session_state.source}**")
     st.write("")
 
-    if 'question' not in st.session_state:
+    if 'question' not in st.session_state and get_task(st.session_state, "question") is None:
         init()
 
     reset, points, questions, settings = st.columns([2, 2, 2, 6], gap="small")
@@ -57,10 +94,45 @@ def main():
     with settings.expander('Settings'):
         st.text_input('Contestant Name', key='contestant', on_change=restart)
         st.radio('Question Source:', ('JArchive', 'ChatGPT'), key='source', on_change=restart, horizontal=True)
+        if st.session_state.source == "JArchive":
+            st.checkbox('Adaptive difficulty', key='adaptive', on_change=restart,
+                        help="Pick clues from categories and difficulties you have about even odds on")
+            st.text_input('Category', key='category_query', on_change=restart,
+                          help="Type the start of any word in an archive category")
+            if st.session_state.get("category_query"):
+                # Built once a category is typed, in the background
+                index = get_task_runner().shared("search_index", get_search_index, max_age=60)
+                if index is None:
+                    st.caption("Indexing archive categories...")
+                else:
+                    completions = index.complete_category(st.session_state.category_query, limit=8)
+                    st.caption(" · ".join(completions) if completions else "No matching archive category")
+        if st.session_state.source == "ChatGPT":
+            st.caption("Question pool")
+            st.json(get_question_pool().stats(), expanded=False)
         #st.select_slider('Number of Questions', list(range(1, 6)), 3, key='totq', on_change=restart)
     
     header1, header2, header3, placeholder, debug, end = st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty()
 
+    try:
+        fetched = collect(st.session_state, "question", timeout=0.1)
+        if fetched is not PENDING and fetched is not None and not fetched:
+            # Upstream is down and no clue has been remembered yet
+            raise LookupError("no clues are available right now")
+    except Exception as exc:
+        debug.error(f"Could not get a question: {exc}")
+        st.button('Try again', on_click=restart)
+        return
+    if fetched is not PENDING and fetched is not None:
+        st.session_state.question = fetched
+        # Which question of which game this is, so it is scored only once
+        st.session_state.question_key = (st.session_state.game_id, st.session_state.nq)
+    if 'question' not in st.session_state:
+        header1.info("Fetching the next clue...")
+        questions.button(f'Q: {st.session_state.nq}')
+        points.button(f'Pts: {st.session_state.points}')
+        return
+
     category = st.session_state.question[0]
     question = st.session_state.question[1]
     answer = st.session_state.question[2]
@@ -77,26 +149,35 @@ def main():
             debug.warning('Please make a guess')
     else:
         prev_guess = guess
-        sresponse = sanitize(guess)
-        sanswer = sanitize(answer)
-        sanswer = sanswer.split()[-1]
-        
-        if (compare_strings(sresponse, sanswer) >= 0.5):
+        correct = grade_response(guess, answer, question)
+
+        if correct:
             debug.success(f"**Correct**, the answer was: {answer}! 🎈")
-            st.session_state.points += value
-            st.session_state.answered += 1
         else:
             debug.error(f"**Incorrect**, the answer was: {answer}! 😓")
-            st.session_state.points -= value
-        
-        st.session_state.nq += 1
+        # Any rerun (a click on Q:/Pts:) grades the guess again; score it once
+        if st.session_state.get("recorded") != st.session_state.get("question_key"):
+            st.session_state.recorded = st.session_state.get("question_key")
+            record_answer(st.session_state, correct, value)
+            scheduled = getattr(st.session_state.clues, "scheduled_clue", None)
+            if st.session_state.get("adaptive") and scheduled:
+                from scheduler import get_scheduler
+                get_scheduler().record_clue(f"contestant:{st.session_state.contestant}", scheduled, correct)
+            get_leaderboard().record(f"contestant_vs_{st.session_state.source.lower()}",
+                                     st.session_state.contestant, category, correct, value,
+                                     game_id=st.session_state.game_id)
             
-        if st.session_state.nq < st.session_state.totq:            
+        if not is_game_over(st.session_state):
             st.button('Next', on_click=restart)
 
-    if st.session_state.nq == st.session_state.totq:
-        score = f"{st.session_state.points} ({st.session_state.answered}/{st.session_state.nq})"
+    if is_game_over(st.session_state):
+        score = score_line(st.session_state)
         end.error(f"**Sorry, Game Over** Your score: {score} 😓")
+        total = get_leaderboard().stats("contestant", st.session_state.contestant)
+        st.write(f"**All-time points for {st.session_state.contestant}:** {total['points']} "
+                 f"({total['correct']}/{total['total']})")
+        st.caption("Leaderboard")
+        st.table(get_leaderboard().top(n=5))
         st.button('Play again?', on_click=init)
         
     questions.button(f'Q: {st.session_state.nq}' if st.session_state.nq <= st.session_state.totq else "💀 Over")
@@ -105,5 +186,8 @@ def main():
  
 
 if __name__ == "__main__":
-    main()
-    footer()
\ No newline at end of file
+    start_exporters()
+    with timer("render", page="contestant_vs_archive"):
+        main()
+    footer()
+    rerun_while_pending(st.session_state)
\ No newline at end of file
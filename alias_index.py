@@ -0,0 +1,273 @@
+"""Acceptable-answer aliases and fast alias matching for grading.
+
+For every archive answer we precompute the forms a contestant might reasonably
+give: the answer with and without its parenthetical ("(Lake) Titicaca"),
+"X or Y" alternates, the place in "Paris, France", a person's surname,
+numerals spelled out or as digits, and acronyms.  Each alias keeps its
+StrikeAMatch character pairs, so grading a response is one pair extraction
+plus a dict intersection per alias.
+
+Only people get a surname alias: an answer counts as a person's name when it
+starts with a known given name (or a title such as "Sir"), or when the clue
+says it is a person ("this man", "she").  Otherwise "york" would pass for
+New York and "road" for Abbey Road.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from normalize import normalize_answer
+from strikeamatch import _get_character_pairs
+
+THRESHOLD = 0.75
+
+_PARENS = re.compile(r"\(([^()]*)\)")
+_ALTERNATES = re.compile(r"\s+or\s+|\s*/\s*")
+_SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+# Lower-case surname particles: "Leonardo da Vinci" -> "da Vinci"
+_PARTICLES = {"da", "de", "del", "della", "di", "du", "la", "le", "van", "von", "der"}
+_STOPWORDS = {"of", "the", "and", "or", "a", "an", "for", "in", "on", "to", "&"}
+_TITLES = {"sir", "dame", "lord", "lady", "dr", "mr", "mrs", "ms", "saint", "st", "pope", "king", "queen",
+           "president", "general", "captain", "prince", "princess"}
+# Common given names; ones that are also place names (Jordan, Georgia,
+# Victoria, Austin...) are left out
+_GIVEN_NAMES = set("""
+aaron abraham ada adam adolf al alan albert alexander alexandre alfred alice allen amelia amy andrew andy
+angela ann anna anne annie anthony anton antonio arnold arthur audrey babe barack barbara ben benjamin
+bernard betty bill billie billy bob bobby bono brad bruce buddy carl carlos carol caroline cary catherine
+cecil charles charlie charlotte chris christian christopher chuck clara clark claude claudia clint
+cole daniel dante dave david dean dennis diana diane dick don donald doris dorothy dwight earl ed eddie
+edgar edith edmund edward edwin elizabeth ella ellen elton elvis emily emma enrico eric ernest ernst
+eva evelyn ezra fidel frances francis francisco frank franklin franz fred frederick friedrich gabriel
+galileo gene geoffrey george gerald gertrude giovanni giuseppe glenn gloria grace greg gregory grover
+gustav hank hannah hans harold harper harriet harrison harry heinrich helen henri henry herbert herman
+howard hugh humphrey ian igor ingrid isaac isabella ivan jack jackie jacob jacques james jane janet
+jean jeff jennifer jerry jesse jim jimi jimmy joan joe johann johannes john johnny jon jonathan jose
+joseph josephine juan judy jules julia julian julie julius karl kate katharine katherine kathleen
+keith ken kenneth kevin kurt langston larry laura lauren lawrence leo leon leonard leonardo leonid
+leslie lewis liam linda lionel lorenzo louis louisa louise lucille lucy ludwig luis lyndon mahatma
+malcolm marco margaret maria marie marilyn mark martha martin mary matthew maurice max meryl michael
+michelangelo miguel mike miles nancy napoleon nat nathaniel neil nelson nicolas nicholas niels nikola
+nikolai noah norman oliver orson oscar otto pablo pat patricia patrick paul pearl pete peter philip
+pierre pyotr quentin rachel ralph ray raymond rembrandt rene richard rita rob robert roberto robin
+rod roger ronald rosa rosalind ruth sam samuel sandra sarah sean sigmund simon sonia sophia stanley
+stephen steve steven susan sylvia ted teddy thomas tim timothy tom tony truman ulysses vincent virginia
+vladimir walt walter warren wilbur will william willie winston wolfgang woodrow yuri zora
+""".split()) - {"virginia"}
+_PERSON_CLUE = re.compile(r"\b(?:this|these|that) (?:man|woman|men|women|guy|gal|lady|boy|girl|author|writer|"
+                          r"poet|president|actor|actress|singer|composer|painter|artist|scientist|"
+                          r"inventor|explorer|general|king|queen|playwright|novelist|philosopher)\b"
+                          r"|\b(?:he|she|his|her|him)\b", re.IGNORECASE)
+
+_ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+         "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+         "seventeen", "eighteen", "nineteen"]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+
+
+def number_to_words(n):
+    """Spells out 0-999.
+    >>> number_to_words(42), number_to_words(300), number_to_words(7)
+    ('forty two', 'three hundred', 'seven')
+    """
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        return _TENS[n // 10] + ("" if n % 10 == 0 else " " + _ONES[n % 10])
+    rest = "" if n % 100 == 0 else " " + number_to_words(n % 100)
+    return _ONES[n // 100] + " hundred" + rest
+
+
+_WORDS_TO_NUMBER = {number_to_words(n): str(n) for n in range(1000)}
+_NUMBER_WORDS = re.compile(r"\b(?:%s)\b" % "|".join(
+    sorted((re.escape(w) for w in _WORDS_TO_NUMBER), key=len, reverse=True)))
+_DIGITS = re.compile(r"\b\d{1,3}\b")
+
+
+def _numeral_variants(text):
+    variants = set()
+    if _DIGITS.search(text):
+        variants.add(_DIGITS.sub(lambda m: number_to_words(int(m.group())), text))
+    if _NUMBER_WORDS.search(text):
+        variants.add(_NUMBER_WORDS.sub(lambda m: _WORDS_TO_NUMBER[m.group()], text))
+    return variants
+
+
+def _name_words(raw):
+    return [w for w in re.sub(r"[^\w\s.'-]", "", raw).split() if w.lower().strip(".") not in _SUFFIXES]
+
+
+def _looks_like_name(raw, person=False):
+    """True if ``raw`` reads as a person's name; ``person`` if the clue says it is one.
+    >>> _looks_like_name("Abraham Lincoln"), _looks_like_name("Mexico City"), _looks_like_name("Paris, France")
+    (True, False, False)
+    >>> _looks_like_name("Galileo Galilei"), _looks_like_name("Enzo Ferrari"), _looks_like_name("Enzo Ferrari", True)
+    (True, False, True)
+    """
+    if _place(raw):
+        return False
+    words = [w for w in _name_words(raw) if w not in _PARTICLES]
+    if not (2 <= len(words) <= 4
+            and all(w[:1].isupper() and not w.isupper() for w in words)
+            and not any(w.lower() in _STOPWORDS or w.lower() in _WORDS_TO_NUMBER for w in words)):
+        return False
+    first = words[0].lower().strip(".")
+    return person or first in _GIVEN_NAMES or first in _TITLES
+
+
+def _place(raw):
+    """The "Paris" of "Paris, France", or None (a trailing "Jr." is not a place)."""
+    parts = raw.split(",")
+    if len(parts) != 2 or parts[1].strip().lower().strip(".") in _SUFFIXES:
+        return None
+    return parts[0].strip() or None
+
+
+def _surname(raw):
+    words = _name_words(raw)
+    start = len(words) - 1
+    while start > 1 and words[start - 1] in _PARTICLES:
+        start -= 1
+    return " ".join(words[start:])
+
+
+def answer_aliases(answer, person=False):
+    """Returns the normalized forms accepted for ``answer``.
+
+    ``person`` marks an answer the clue says is a person.
+    >>> sorted(answer_aliases('(Lake) Titicaca'))
+    ['lake titicaca', 'titicaca']
+    >>> sorted(answer_aliases('Abraham Lincoln'))
+    ['abraham lincoln', 'lincoln']
+    >>> sorted(answer_aliases('Leonardo da Vinci'))
+    ['da vinci', 'leonardo da vinci']
+    >>> sorted(answer_aliases('The 3 Musketeers'))
+    ['3 musketeers', 'three musketeers']
+    >>> sorted(answer_aliases('Jekyll or Hyde'))
+    ['hyde', 'jekyll', 'jekyll or hyde']
+    >>> sorted(answer_aliases('National Aeronautics and Space Administration (NASA)'))[:2]
+    ['nasa', 'national aeronautics and space administration']
+    >>> sorted(answer_aliases('Abbey Road')), sorted(answer_aliases('Paris, France'))
+    (['abbey road'], ['paris', 'paris france'])
+    """
+    forms = {answer, _PARENS.sub(r"\1", answer)}
+    has_acronym = False
+    for inner in _PARENS.findall(answer):
+        inner = inner.strip()
+        if inner.lower().startswith("or "):
+            forms.add(inner[3:])
+        elif inner.isupper():
+            forms.add(inner)
+            has_acronym = True
+    base = _PARENS.sub("", answer).strip()
+    forms.add(base)
+    for part in _ALTERNATES.split(base):
+        forms.add(part)
+    if _place(base):
+        forms.add(_place(base))
+    is_name = not has_acronym and _looks_like_name(base, person)
+    if is_name:
+        forms.add(_surname(base))
+
+    aliases = set()
+    for form in forms:
+        alias = normalize_answer(form)
+        if not alias:
+            continue
+        aliases.add(alias)
+        aliases.update(_numeral_variants(alias))
+        if re.fullmatch(r"(?:\w )+\w", alias):
+            # "U.S.A." normalizes to "u s a"
+            aliases.add(alias.replace(" ", ""))
+
+    # Acronyms of multi-word titles and organizations ("NASA"), but not of
+    # people's names, where initials are rarely an acceptable response
+    words = [w for w in normalize_answer(base).split() if w not in _STOPWORDS]
+    if not is_name and 3 <= len(words) <= 6:
+        aliases.add("".join(w[0] for w in words))
+    return aliases
+
+
+class _Alias(object):
+    __slots__ = ("text", "answer", "pairs", "size")
+
+    def __init__(self, text, answer):
+        self.text = text
+        self.answer = answer
+        self.pairs = _get_character_pairs(text)
+        self.size = sum(self.pairs.values())
+
+
+def _dice(pairs, size, alias):
+    if size + alias.size == 0:
+        return 0.0
+    small, large = (pairs, alias.pairs) if len(pairs) < len(alias.pairs) else (alias.pairs, pairs)
+    overlap = sum(min(count, large[p]) for p, count in small.items() if p in large)
+    return 2.0 * overlap / (size + alias.size)
+
+
+class AliasIndex(object):
+    """Precomputed aliases per answer, for the ``size`` most recently graded answers."""
+
+    def __init__(self, answers=(), threshold=THRESHOLD, size=65536):
+        self.threshold = threshold
+        self.size = size
+        self._aliases = OrderedDict()
+        self._lock = threading.Lock()
+        for answer in answers:
+            self.add(answer)
+
+    def __len__(self):
+        return len(self._aliases)
+
+    def add(self, answer, person=False):
+        """Precomputes the aliases of ``answer``; returns them."""
+        key = (answer, person)
+        with self._lock:
+            aliases = self._aliases.get(key)
+            if aliases is not None:
+                self._aliases.move_to_end(key)
+                return aliases
+        aliases = [_Alias(text, answer) for text in answer_aliases(answer, person)]
+        with self._lock:
+            self._aliases[key] = aliases
+            if len(self._aliases) > self.size:
+                self._aliases.popitem(last=False)
+        return aliases
+
+    def aliases(self, answer, clue=None):
+        """The aliases of ``answer``; ``clue`` tells whether it is a person."""
+        return self.add(answer, bool(clue and _PERSON_CLUE.search(clue)))
+
+    def score(self, response, answer, clue=None):
+        """Best (score, alias) for ``response`` among the aliases of ``answer``.
+
+        ``clue`` is only used to tell whether the answer is a person.
+        """
+        text = normalize_answer(response)
+        aliases = self.aliases(answer, clue)
+        if not text or not aliases:
+            return 0.0, None
+        for alias in aliases:
+            if alias.text == text:
+                return 1.0, alias.text
+        pairs = _get_character_pairs(text)
+        size = sum(pairs.values())
+        best = max(aliases, key=lambda alias: _dice(pairs, size, alias))
+        return _dice(pairs, size, best), best.text
+
+    def is_correct(self, response, answer, clue=None):
+        return self.score(response, answer, clue)[0] >= self.threshold
+
+
+_alias_index = None
+_alias_index_lock = threading.Lock()
+
+
+def get_alias_index():
+    """Returns the process-wide alias index (answers are added as they are graded)."""
+    global _alias_index
+    with _alias_index_lock:
+        if _alias_index is None:
+            _alias_index = AliasIndex()
+        return _alias_index
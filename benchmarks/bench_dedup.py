@@ -0,0 +1,80 @@
+"""Near-duplicate checks against an archive-sized index.
+
+Indexes a corpus of random-word clues, half of them ending in a name, then
+checks rewordings of indexed clues (a word swapped, one dropped, words
+reordered, punctuation), fresh clues, and templated clues: an indexed clue
+with its name swapped for another ("This river flows through Cairo" ->
+"... Paris").  Reports build time, per-check latency, how many rewordings
+were caught and how many fresh and templated clues were wrongly flagged,
+next to a brute-force comparison against every indexed signature.
+
+    python benchmarks/bench_dedup.py [clues] [checks]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dedup_index import DedupIndex
+
+
+def corpus(n, rng, words):
+    clues = [f"This {' '.join(rng.choice(words) for _ in range(rng.randint(6, 14)))}" for _ in range(n)]
+    return [clue + f" {rng.choice(words).title()}" if i % 2 else clue for i, clue in enumerate(clues)]
+
+
+def templated(text, rng, words):
+    tokens = text.split()
+    tokens[-1] = rng.choice(words).title()
+    return " ".join(tokens)
+
+
+def reword(text, rng, words):
+    tokens = text.split()
+    i = rng.randrange(1, len(tokens))
+    change = rng.choice(["swap", "drop", "reorder", "punctuate"])
+    if change == "swap":
+        tokens[i] = rng.choice(words)
+    elif change == "drop":
+        del tokens[i]
+    elif change == "reorder":
+        j = rng.randrange(1, len(tokens))
+        tokens[i], tokens[j] = tokens[j], tokens[i]
+    else:
+        tokens[-1] += rng.choice(["!", "?", "..."])
+    return " ".join(tokens)
+
+
+def main(n=200000, checks=2000):
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+             for _ in range(20000)]
+    clues = corpus(n, rng, words)
+    start = time.perf_counter()
+    index = DedupIndex(clues)
+    print(f"index: {n} clues built in {time.perf_counter() - start:.2f}s")
+
+    rewordings = [reword(clue, rng, words) for clue in rng.sample(clues, checks)]
+    fresh = corpus(checks, rng, words)
+    named = [templated(clue, rng, words) for clue in rng.sample(clues[1::2], checks)]
+    start = time.perf_counter()
+    caught = sum(map(index.is_duplicate, rewordings))
+    flagged = sum(map(index.is_duplicate, fresh))
+    per = (time.perf_counter() - start) / (2 * checks)
+    swapped = sum(map(index.is_duplicate, named))
+    print(f"  index check: {per * 1e6:8.1f} us/check, {caught}/{checks} rewordings caught, "
+          f"{flagged}/{checks} fresh and {swapped}/{checks} templated clues flagged")
+
+    sigs = index._sigs[:len(index)]
+    scan = min(checks, 50)
+    start = time.perf_counter()
+    for text in rewordings[:scan]:
+        (sigs == (index.signature(text) & np.uint64(0xFFFF))).mean(axis=1).max()
+    print(f"  brute force: {(time.perf_counter() - start) / scan * 1e6:8.1f} us/check")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,127 @@
+"""Accuracy and latency of answer grading on a small labeled set.
+
+Compares the Contestant page's original grading (last word of the answer,
+``compare_strings`` >= 0.5), the Archive page's original grading (full
+answer, >= 0.5) and the alias index used by ``game_engine.grade_response``.
+
+    python benchmarks/bench_grading.py [repeats]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from alias_index import AliasIndex
+from strikeamatch import compare_strings
+
+# (response, archive answer, should be accepted)
+LABELED = [
+    ("lincoln", "Abraham Lincoln", True),
+    ("abraham lincoln", "Abraham Lincoln", True),
+    ("abe lincoln", "Abraham Lincoln", True),
+    ("john", "John Adams", False),
+    ("adams", "John Adams", True),
+    ("john quincy adams", "John Adams", False),
+    ("titicaca", "(Lake) Titicaca", True),
+    ("lake titicaca", "(Lake) Titicaca", True),
+    ("lake victoria", "(Lake) Titicaca", False),
+    ("the beatles", "The Beatles", True),
+    ("beatles", "The Beatles", True),
+    ("the monkees", "The Beatles", False),
+    ("three musketeers", "The 3 Musketeers", True),
+    ("3 musketeers", "The 3 Musketeers", True),
+    ("musketeers", "The 3 Musketeers", False),
+    ("12 angry men", "Twelve Angry Men", True),
+    ("angry men", "Twelve Angry Men", False),
+    ("nasa", "National Aeronautics and Space Administration (NASA)", True),
+    ("space administration", "National Aeronautics and Space Administration (NASA)", False),
+    ("un", "United Nations (UN)", True),
+    ("united nations", "United Nations (UN)", True),
+    ("usa", "U.S.A.", True),
+    ("pokemon", "Pokémon", True),
+    ("spiderman", "Spider-Man", True),
+    ("spider-man", "Spider-Man", True),
+    ("batman", "Spider-Man", False),
+    ("jekyll", "Jekyll or Hyde", True),
+    ("hyde", "Jekyll or Hyde", True),
+    ("king", "Martin Luther King Jr.", True),
+    ("martin luther king", "Martin Luther King Jr.", True),
+    ("martin luther", "Martin Luther King Jr.", False),
+    ("mercury", "Mercury", True),
+    ("mars", "Mercury", False),
+    ("new york", "New Jersey", False),
+    ("new york city", "New York", True),
+    ("the grapes of wrath", "The Grapes of Wrath", True),
+    ("grapes", "The Grapes of Wrath", False),
+    ("wrath", "The Grapes of Wrath", False),
+    ("leonardo", "Leonardo da Vinci", False),
+    ("da vinci", "Leonardo da Vinci", True),
+    ("photosynthesis", "photosynthesis", True),
+    ("photosinthesis", "photosynthesis", True),
+    ("osmosis", "photosynthesis", False),
+    ("a pineapple", "pineapple", True),
+    ("apple", "pineapple", False),
+    # Places and titles: the last word alone is not the answer
+    ("york", "New York", False),
+    ("new york", "New York", True),
+    ("city", "Mexico City", False),
+    ("mexico city", "Mexico City", True),
+    ("war", "Civil War", False),
+    ("the civil war", "Civil War", True),
+    ("road", "Abbey Road", False),
+    ("abbey road", "Abbey Road", True),
+    ("canal", "Panama Canal", False),
+    ("panama canal", "Panama Canal", True),
+    ("states", "United States", False),
+    ("united states", "United States", True),
+    ("bay", "Green Bay", False),
+    ("green bay", "Green Bay", True),
+    ("paris", "Paris, France", True),
+    ("france", "Paris, France", False),
+    ("wind", "Gone with the Wind", False),
+    ("park", "Jurassic Park", False),
+    ("lennon", "John Lennon", True),
+    ("curie", "Marie Curie", True),
+    ("marie", "Marie Curie", False),
+]
+
+
+def legacy_sanitize(string):
+    string = re.sub(r"/[^\w\s]/i", "", string)
+    string = re.sub(r"\([^()]*\)", "", string)
+    string = re.sub(r"/^(the|a|an) /i", "", string)
+    return string.strip().lower()
+
+
+def contestant_page(response, answer):
+    sanswer = legacy_sanitize(answer).split()[-1]
+    return compare_strings(legacy_sanitize(response), sanswer) >= 0.5
+
+
+def archive_page(response, answer):
+    return compare_strings(legacy_sanitize(response.lower()), legacy_sanitize(answer)) >= 0.5
+
+
+def run(name, grade, repeats):
+    correct = sum(grade(r, a) == label for r, a, label in LABELED)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for r, a, _ in LABELED:
+            grade(r, a)
+    per_call = (time.perf_counter() - start) / (repeats * len(LABELED))
+    print(f"{name:>15}: accuracy {correct}/{len(LABELED)} ({correct / len(LABELED):.0%}), "
+          f"{per_call * 1e6:6.1f} us/grade")
+
+
+def main(repeats=200):
+    start = time.perf_counter()
+    index = AliasIndex(a for _, a, _ in LABELED)
+    print(f"alias index: {len(index)} answers built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    run("contestant page", contestant_page, repeats)
+    run("archive page", archive_page, repeats)
+    run("alias index", index.is_correct, repeats)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
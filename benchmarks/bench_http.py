@@ -0,0 +1,81 @@
+"""Clue fetch latency under concurrent sessions against a local stand-in server.
+
+Starts a keep-alive HTTP server that mimics cluebase's ``/clues/random`` (with
+a fixed service delay) and compares bare ``requests.get`` calls, as the app
+used to make, with the pooled ``HttpClient``.
+
+    python benchmarks/bench_http.py [sessions] [requests_per_session]
+"""
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import HttpClient
+
+SERVICE_DELAY = 0.002
+BODY = json.dumps({"data": [{"id": 1, "category": "HISTORY", "clue": "A clue",
+                             "response": "An answer", "value": 400}]}).encode()
+
+
+class CluebaseStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(SERVICE_DELAY)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(name, fetch, url, sessions, per_session):
+    latencies = []
+    lock = threading.Lock()
+
+    def session():
+        for _ in range(per_session):
+            start = time.perf_counter()
+            fetch(url)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as pool:
+        for future in [pool.submit(session) for _ in range(sessions)]:
+            future.result()
+    wall = time.perf_counter() - start
+    latencies.sort()
+    print(f"{name:>8}: {len(latencies) / wall:8,.0f} req/s  "
+          f"p50 {statistics.median(latencies) * 1000:6.2f} ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.2f} ms")
+
+
+def main(sessions=16, per_session=100):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CluebaseStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/clues/random"
+    print(f"{sessions} concurrent sessions x {per_session} clue fetches, "
+          f"{SERVICE_DELAY * 1000:.0f} ms service time")
+
+    run("bare", lambda u: json.loads(requests.get(u).text), url, sessions, per_session)
+    client = HttpClient(max_per_host=sessions)
+    run("pooled", client.get_json, url, sessions, per_session)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
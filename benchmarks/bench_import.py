@@ -0,0 +1,51 @@
+"""Cold-start time of each page.
+
+Every page is executed (without calling ``main``) in a fresh interpreter, so
+the numbers include all imports and module-level setup a new Streamlit worker
+pays before it can render.
+
+    python benchmarks/bench_import.py [repeats]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = [
+    "Contestant_vs_Archive.py",
+    "pages/2_ChatGPT_vs_Archive.py",
+    "pages/3_ChatGPT_vs_World.py",
+]
+
+_PROBE = """
+import runpy, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+runpy.run_path({page!r}, run_name="__bench__")
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start(page):
+    probe = _PROBE.format(root=ROOT, page=os.path.join(ROOT, page))
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(repeats=5):
+    for page in PAGES:
+        try:
+            times = [cold_start(page) for _ in range(repeats)]
+        except RuntimeError as exc:
+            print(f"{page:>32}: failed ({exc})")
+            continue
+        print(f"{page:>32}: median {statistics.median(times) * 1000:8.1f} ms, "
+              f"min {min(times) * 1000:8.1f} ms over {repeats} runs")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
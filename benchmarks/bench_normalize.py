@@ -0,0 +1,61 @@
+"""Throughput of the answer normalization + grading path.
+
+Compares the original regex ``sanitize`` (recompiled through ``re.sub`` on
+every call) against ``normalize.normalize_answer``, both feeding
+``compare_strings`` the way the pages do.
+
+    python benchmarks/bench_normalize.py [n]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from normalize import normalize_answer
+from strikeamatch import compare_strings
+
+ANSWERS = [
+    "The Beatles", "(Lake) Titicaca", "Abraham Lincoln", "a pineapple",
+    "Pokémon", "Dr. Jekyll & Mr. Hyde", "the Louvre", "Ol' Blue Eyes",
+    "Mount Kilimanjaro", "an anchor", "Mercury", "Beyoncé",
+    "The Grapes of Wrath", "Spider-Man", "Isaac Newton", "photosynthesis",
+    "(Harry) Houdini", "the Rosetta Stone", "Q-tip", "Leonardo da Vinci",
+]
+
+
+def legacy_sanitize(string):
+    string = re.sub(r"/[^\w\s]/i", "", string)
+    string = re.sub(r"\([^()]*\)", "", string)
+    string = re.sub(r"/^(the|a|an) /i", "", string)
+    string = string.strip().lower()
+    return string
+
+
+def run(name, normalize, pairs):
+    start = time.perf_counter()
+    correct = 0
+    for response, answer in pairs:
+        if compare_strings(normalize(response), normalize(answer)) >= 0.5:
+            correct += 1
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {len(pairs) / elapsed:12,.0f} gradings/s  ({correct} correct)")
+
+
+def main(n=100000):
+    random.seed(0)
+    pairs = []
+    for _ in range(n):
+        answer = random.choice(ANSWERS)
+        response = random.choice([answer, answer.lower(), random.choice(ANSWERS)])
+        pairs.append((response, answer))
+
+    run("legacy", legacy_sanitize, pairs)
+    normalize_answer.cache_clear()
+    run("normalize", normalize_answer, pairs)
+    print(normalize_answer.cache_info())
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
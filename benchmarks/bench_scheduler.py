@@ -0,0 +1,83 @@
+"""How many LLM calls it takes to estimate a model's per-category accuracy.
+
+A simulated model answers clues from a synthetic corpus with skewed category
+sizes, where every category has its own true accuracy.  For a range of call
+budgets, clues are drawn either uniformly at random (as ``llm_batch.py`` does
+by default) or by the ``explore`` scheduler, and the mean absolute error of
+the per-category accuracy estimates is reported.  Also reports the cost of one
+scheduler selection.
+
+    python benchmarks/bench_scheduler.py [categories] [trials]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clue_source import LocalClueStore, make_clue
+from scheduler import Scheduler
+
+
+def corpus(n_categories, rng):
+    # Zipf-like sizes: a few huge categories, a long tail of small ones
+    sizes = np.maximum(5, (2000 / np.arange(1, n_categories + 1) ** 0.8).astype(int))
+    skill = rng.uniform(-1.0, 2.5, n_categories)
+    clues = []
+    for cat, size in enumerate(sizes):
+        for i in range(size):
+            clues.append(make_clue({"id": len(clues), "category": f"CATEGORY {cat}",
+                                    "clue": f"clue {cat}-{i}", "response": "x",
+                                    "value": 200 * (1 + i % 5)}))
+    return LocalClueStore(clues), skill
+
+
+def p_correct(skill, difficulty):
+    return 1 / (1 + np.exp(-(skill - 0.6 * (difficulty - 3))))
+
+
+def error(asked, correct, truth):
+    # Posterior mean under a uniform prior, so unseen categories estimate 0.5
+    estimate = (correct + 1) / (asked + 2)
+    return float(np.mean(np.abs(estimate - truth)))
+
+
+def trial(store, skill, budget, policy, rng):
+    scheduler = Scheduler.from_store(store, policy="explore", seed=int(rng.integers(1 << 30)))
+    asked = np.zeros(len(skill))
+    correct = np.zeros(len(skill))
+    for _ in range(budget):
+        if policy == "random":
+            clue = store.random_clue()
+        else:
+            clue = scheduler.next_clue("model:sim", store)
+        cat = int(clue["category"].rsplit(" ", 1)[1])
+        ok = rng.random() < p_correct(skill[cat], clue["difficulty"])
+        scheduler.record_clue("model:sim", clue, ok)
+        asked[cat] += 1
+        correct[cat] += ok
+    truth = np.mean([p_correct(skill, d) for d in range(1, 6)], axis=0)
+    return error(asked, correct, truth)
+
+
+def main(n_categories=200, trials=5):
+    rng = np.random.default_rng(0)
+    store, skill = corpus(n_categories, rng)
+    print(f"{len(store)} clues in {n_categories} categories, {trials} trials per point")
+    print(f"{'calls':>7} {'random':>10} {'explore':>10}")
+    for budget in (250, 500, 1000, 2000, 4000):
+        errors = {policy: np.mean([trial(store, skill, budget, policy, rng) for _ in range(trials)])
+                  for policy in ("random", "explore")}
+        print(f"{budget:7d} {errors['random']:10.3f} {errors['explore']:10.3f}")
+
+    scheduler = Scheduler.from_store(store, policy="explore")
+    start = time.perf_counter()
+    for _ in range(10000):
+        scheduler.choose("model:sim")
+    print(f"selection: {(time.perf_counter() - start) / 10000 * 1e6:.1f} us "
+          f"over {len(scheduler)} cells")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,64 @@
+"""Clue lookup latency: the search index vs. a linear ``compare_strings`` scan.
+
+Builds a corpus of random-word clues, then looks up perturbed copies of
+corpus clues (extra word, changed case, punctuation) and reports build time,
+per-lookup latency, how often the right clue came back, and the latency of
+category prefix completion.
+
+    python benchmarks/bench_search.py [clues] [lookups]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clue_source import make_clue
+from search_index import ClueSearchIndex
+from strikeamatch import compare_strings
+
+
+def corpus(n, rng):
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+             for _ in range(20000)]
+    categories = [" ".join(rng.choice(words).upper() for _ in range(rng.randint(1, 3)))
+                  for _ in range(n // 20 + 1)]
+    return [make_clue({"id": i, "category": rng.choice(categories), "response": "x",
+                       "clue": " ".join(rng.choice(words) for _ in range(rng.randint(6, 14)))})
+            for i in range(n)]
+
+
+def perturb(text, rng):
+    return text.upper() + rng.choice(["!", "?", " the", " indeed"])
+
+
+def main(n=100000, lookups=50):
+    rng = random.Random(0)
+    clues = corpus(n, rng)
+    start = time.perf_counter()
+    index = ClueSearchIndex(clues)
+    print(f"index: {n} clues built in {time.perf_counter() - start:.2f}s")
+
+    targets = rng.sample(clues, lookups)
+    queries = [perturb(clue["clue"], rng) for clue in targets]
+    start = time.perf_counter()
+    hits = sum(index.match(q) is t for q, t in zip(queries, targets))
+    per = (time.perf_counter() - start) / lookups
+    print(f"  index match: {per * 1000:8.2f} ms/lookup, {hits}/{lookups} found")
+
+    scan = min(lookups, 2)
+    start = time.perf_counter()
+    hits = sum(max(clues, key=lambda c: compare_strings(q, c["clue"])) is t
+               for q, t in zip(queries[:scan], targets[:scan]))
+    per = (time.perf_counter() - start) / scan
+    print(f"  linear scan: {per * 1000:8.2f} ms/lookup, {hits}/{scan} found")
+
+    prefixes = [clue["category"].split()[-1][:3] for clue in targets]
+    start = time.perf_counter()
+    for prefix in prefixes:
+        index.complete_category(prefix)
+    print(f"  completion:  {(time.perf_counter() - start) / lookups * 1e6:8.1f} us/prefix")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""Agent tool-call latency with and without the tool cache, using local fake tools.
+
+Simulated sessions send search and calculator queries that repeat across
+sessions with a Zipf-like popularity and vary in case, spacing, quoting and
+trailing punctuation, the way agents phrase the same search.  The fake tools
+sleep for a fixed service time.  Reports the calls that reached a tool, the
+hit rate and the mean time per call.  It also checks TTL expiry and size
+eviction.
+
+    python benchmarks/bench_tools.py [sessions] [calls_per_session]
+"""
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tool_cache import ToolCache
+
+SERVICE_TIME = {"serpapi": 0.02, "wolfram-alpha": 0.04}
+TOPICS = [f"topic {i}" for i in range(300)]
+
+
+class FakeTool(object):
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def run(self, query):
+        with self._lock:
+            self.calls += 1
+        time.sleep(SERVICE_TIME[self.name])
+        return f"{self.name} result for {query.strip().lower()}"
+
+
+def phrasing(rng, topic):
+    query = rng.choice([topic, topic.upper(), topic.title(), f"  {topic}", f'"{topic}"'])
+    return query + rng.choice(["", "?", " ", "."])
+
+
+def run(name, tools, call, sessions, per_session, seed=0):
+    weights = [1 / (i + 1) for i in range(len(TOPICS))]
+
+    def session(i):
+        rng = random.Random(seed + i)
+        for _ in range(per_session):
+            tool = tools[rng.random() < 0.3]
+            call(tool, phrasing(rng, rng.choices(TOPICS, weights)[0]))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    elapsed = time.perf_counter() - start
+    total = sessions * per_session
+    upstream = sum(tool.calls for tool in tools)
+    print(f"{name:>9}: {upstream:5d}/{total} calls reached a tool "
+          f"({1 - upstream / total:5.1%} hit rate), {elapsed / total * 1000 * sessions:6.2f} ms/call")
+
+
+def check_eviction():
+    cache = ToolCache(maxsize=2, ttl=0.05)
+    tool = FakeTool("serpapi")
+    for query in ("a", "A ", "b", "c", "a"):
+        cache.call(tool.name, query, tool.run)
+    # "a" was evicted by "b" and "c" (size 2), so it is fetched again
+    assert tool.calls == 4, tool.calls
+    time.sleep(0.06)
+    cache.call(tool.name, "c", tool.run)
+    assert tool.calls == 5, "expired entry should be refetched"
+    print("eviction: size limit and TTL honoured")
+
+
+def main(sessions=8, per_session=100):
+    tools = [FakeTool("serpapi"), FakeTool("wolfram-alpha")]
+    run("no cache", tools, lambda tool, query: tool.run(query), sessions, per_session)
+    cache = ToolCache()
+    tools = [FakeTool("serpapi"), FakeTool("wolfram-alpha")]
+    run("cached", tools, lambda tool, query: cache.call(tool.name, query, tool.run),
+        sessions, per_session)
+    check_eviction()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
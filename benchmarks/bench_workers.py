@@ -0,0 +1,103 @@
+"""Throughput of the multi-process server mode as workers are added.
+
+Each worker is a fresh process that plays ChatGPT vs Archive rounds from
+several session threads: draw a clue, answer it with a stub LLM (fixed latency
+standing in for the OpenAI call) through the response cache, grade it.  The
+same total number of rounds is spread over 1, 2, 4, ... workers, once with
+per-process caches and once with the shared SQLite caches of
+``JEOPARDY_SHARED_CACHE``, where a clue answered by any worker is a cache hit
+for all of them.
+
+    python benchmarks/bench_workers.py [rounds] [max_workers] [clues]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+SESSIONS_PER_WORKER = 4
+LLM_LATENCY = 0.05
+
+
+def worker(cache_dir, rounds, clues, ready, go, results):
+    if cache_dir:
+        os.environ["JEOPARDY_SHARED_CACHE"] = cache_dir
+    from clue_source import set_clue_source
+    from game_engine import grade_response
+    from prompts import render
+    from response_cache import cached_llm_call, get_response_cache
+    from shared_cache import SharedClueStore
+    from simulator import synthetic_store
+    from stub_llm import StubLLM
+
+    if cache_dir:
+        store = SharedClueStore(os.path.join(cache_dir, "clues.sqlite"))
+    else:
+        store = synthetic_store(clues)
+    set_clue_source(store)
+    answers = {clue["clue"]: clue["response"] for clue in synthetic_store(clues)}
+    llm = StubLLM(answers, latency=LLM_LATENCY, jitter=0)
+
+    def session(n):
+        for _ in range(n):
+            clue = store.random_clue()
+            prompt = render("answer", category=clue["category"], clue=clue["clue"])
+            grade_response(cached_llm_call(llm, prompt), clue["response"])
+
+    per_session = [rounds // SESSIONS_PER_WORKER + (i < rounds % SESSIONS_PER_WORKER)
+                   for i in range(SESSIONS_PER_WORKER)]
+    threads = [threading.Thread(target=session, args=(n,)) for n in per_session]
+    # Start timing once every worker has paid its imports and setup
+    ready.put(os.getpid())
+    go.wait()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((get_response_cache().hits, get_response_cache().misses))
+
+
+def run(workers, rounds, clues, shared):
+    ctx = multiprocessing.get_context("spawn")
+    ready, go, results = ctx.Queue(), ctx.Event(), ctx.Queue()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if shared:
+            from shared_cache import SharedClueStore
+            from simulator import synthetic_store
+            SharedClueStore(os.path.join(cache_dir, "clues.sqlite")).add_many(synthetic_store(clues))
+        procs = [ctx.Process(target=worker, args=(cache_dir if shared else None,
+                                                   rounds // workers, clues, ready, go, results))
+                 for _ in range(workers)]
+        for proc in procs:
+            proc.start()
+        for _ in procs:
+            ready.get()
+        start = time.perf_counter()
+        go.set()
+        counts = [results.get() for _ in procs]
+        wall = time.perf_counter() - start
+        for proc in procs:
+            proc.join()
+    hits = sum(h for h, _ in counts)
+    total = hits + sum(m for _, m in counts)
+    print(f"{'shared' if shared else 'private':>8} caches, {workers} worker(s): "
+          f"{total / wall:8.0f} rounds/s  cache hit rate {hits / total:5.1%}  ({wall:.2f}s)")
+
+
+def main(rounds=4000, max_workers=4, clues=1000):
+    print(f"{rounds} rounds over {clues} clues, {SESSIONS_PER_WORKER} sessions/worker, "
+          f"{LLM_LATENCY * 1000:.0f} ms LLM latency, {os.cpu_count()} CPU(s)")
+    for shared in (False, True):
+        workers = 1
+        while workers <= max_workers:
+            run(workers, rounds, clues, shared)
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
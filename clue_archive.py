@@ -0,0 +1,262 @@
+"""Compact, memory-mapped clue archive.
+
+Layout (all integers native-endian, every section 8-byte aligned)::
+
+    b"JCLUEARC" | uint32 header length | JSON header | sections...
+
+Categories and answers are interned into string tables; clue text lives in a
+single buffer addressed by an offset array.  Per-clue columns hold the
+category id, answer id, value, difficulty and source id.  Posting lists of row
+numbers are precomputed per category, per difficulty and per (category,
+difficulty) pair, so a filtered random pick is two array reads.
+
+Because the file is mapped read-only, every Streamlit worker on the host shares
+the same page-cache copy of the corpus.
+
+Build an archive from a CSV/JSONL dump with::
+
+    python clue_archive.py dump.csv clues.jca
+"""
+import json
+import mmap
+import random
+import struct
+import sys
+from array import array
+
+from clue_source import ClueSource, LocalClueStore
+
+MAGIC = b"JCLUEARC"
+VERSION = 1
+# Difficulty 0 holds clues whose value could not be mapped onto 1-5
+N_DIFFICULTY = 6
+
+
+def _string_table(strings):
+    offsets = array("Q", [0])
+    data = bytearray()
+    for s in strings:
+        data += s.encode("utf-8")
+        offsets.append(len(data))
+    return offsets, bytes(data)
+
+
+def _postings(rows, keys, n_keys):
+    """Groups ``rows`` by ``keys`` into (offsets, concatenated rows)."""
+    counts = [0] * n_keys
+    for k in keys:
+        counts[k] += 1
+    offsets = array("Q", [0])
+    for c in counts:
+        offsets.append(offsets[-1] + c)
+    cursor = list(offsets[:-1])
+    postings = array("I", bytes(4 * len(rows)))
+    for row, k in zip(rows, keys):
+        postings[cursor[k]] = row
+        cursor[k] += 1
+    return offsets, postings
+
+
+def build_archive(clues, path):
+    """Writes ``clues`` (dicts as produced by ``clue_source.make_clue``) to ``path``."""
+    categories, category_ids = [], {}
+    answers, answer_ids = [], {}
+    columns = {
+        "clue_category": array("I"),
+        "clue_answer": array("I"),
+        "clue_value": array("i"),
+        "clue_difficulty": array("B"),
+        "clue_id": array("q"),
+    }
+    clue_text = []
+    max_id, missing_ids = 0, []
+
+    for row, clue in enumerate(clues):
+        category = (clue["category"] or "").strip()
+        cat_key = category.lower()
+        if cat_key not in category_ids:
+            category_ids[cat_key] = len(categories)
+            categories.append(category)
+        answer = clue["response"] or ""
+        if answer not in answer_ids:
+            answer_ids[answer] = len(answers)
+            answers.append(answer)
+        try:
+            value = int(str(clue["value"]).lstrip("$").replace(",", ""))
+        except ValueError:
+            value = 0
+        try:
+            clue_id = int(clue["id"])
+            max_id = max(max_id, clue_id)
+        except (TypeError, ValueError):
+            clue_id = 0
+            missing_ids.append(row)
+        try:
+            difficulty = min(max(int(clue["difficulty"] or 0), 0), N_DIFFICULTY - 1)
+        except (TypeError, ValueError):
+            difficulty = 0
+        columns["clue_category"].append(category_ids[cat_key])
+        columns["clue_answer"].append(answer_ids[answer])
+        columns["clue_value"].append(value)
+        columns["clue_difficulty"].append(difficulty)
+        columns["clue_id"].append(clue_id)
+        clue_text.append(clue["clue"] or "")
+
+    # Clues without a numeric id get fresh ones above every real id
+    for next_id, row in enumerate(missing_ids, max_id + 1):
+        columns["clue_id"][row] = next_id
+
+    n = len(clue_text)
+    rows = range(n)
+    cats = columns["clue_category"]
+    diffs = columns["clue_difficulty"]
+    sections = {}
+    sections["cat_offsets"], sections["cat_data"] = _string_table(categories)
+    sections["ans_offsets"], sections["ans_data"] = _string_table(answers)
+    sections["clue_offsets"], sections["clue_data"] = _string_table(clue_text)
+    sections.update(columns)
+    sections["cat_post_offsets"], sections["cat_post"] = _postings(rows, cats, len(categories))
+    sections["diff_post_offsets"], sections["diff_post"] = _postings(rows, diffs, N_DIFFICULTY)
+    sections["pair_post_offsets"], sections["pair_post"] = _postings(
+        rows, [c * N_DIFFICULTY + d for c, d in zip(cats, diffs)], len(categories) * N_DIFFICULTY)
+
+    layout = {}
+    blobs = []
+    position = 0
+    for name, section in sections.items():
+        blob = section.tobytes() if isinstance(section, array) else section
+        typecode = section.typecode if isinstance(section, array) else "B"
+        layout[name] = [position, len(blob), typecode]
+        blobs.append(blob + b"\0" * (-len(blob) % 8))
+        position += len(blobs[-1])
+
+    header = json.dumps({
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "count": n,
+        "categories": len(categories),
+        "sections": layout,
+    }).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+
+
+class ClueArchive(ClueSource):
+    """Read-only, zero-copy view over an archive written by ``build_archive``."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._buf = memoryview(self._mmap)
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a clue archive")
+        (header_len,) = struct.unpack_from("<I", buf, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(buf[start:start + header_len]))
+        if header["version"] != VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written by an incompatible build")
+        base = start + header_len
+
+        self._count = header["count"]
+        self._sections = {}
+        self._views = []
+        for name, (offset, length, typecode) in header["sections"].items():
+            view = buf[base + offset:base + offset + length]
+            self._views.append(view)
+            self._sections[name] = view if typecode == "B" else view.cast(typecode)
+            self._views.append(self._sections[name])
+
+        s = self._sections
+        self._category_ids = {
+            self._string("cat", i).lower(): i for i in range(header["categories"])
+        }
+        self._cat_post = (s["cat_post_offsets"], s["cat_post"])
+        self._diff_post = (s["diff_post_offsets"], s["diff_post"])
+        self._pair_post = (s["pair_post_offsets"], s["pair_post"])
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (self.clue(row) for row in range(self._count))
+
+    def close(self):
+        self._sections = {}
+        self._cat_post = self._diff_post = self._pair_post = None
+        for view in reversed(self._views):
+            view.release()
+        self._buf.release()
+        self._mmap.close()
+        self._file.close()
+
+    def _string(self, table, i):
+        offsets = self._sections[table + "_offsets"]
+        return bytes(self._sections[table + "_data"][offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def categories(self):
+        """All category names in first-seen order."""
+        return [self._string("cat", i) for i in range(len(self._category_ids))]
+
+    def cells(self):
+        offsets = self._pair_post[0]
+        return [(key % N_DIFFICULTY, self._string("cat", key // N_DIFFICULTY))
+                for key in range(len(offsets) - 1)
+                if key % N_DIFFICULTY and offsets[key + 1] > offsets[key]]
+
+    def clue(self, row):
+        s = self._sections
+        return {
+            "id": s["clue_id"][row],
+            "category": self._string("cat", s["clue_category"][row]),
+            "clue": self._string("clue", row),
+            "response": self._string("ans", s["clue_answer"][row]),
+            "value": s["clue_value"][row],
+            "difficulty": s["clue_difficulty"][row] or None,
+        }
+
+    def rows(self, difficulty=None, category=None):
+        """Row numbers matching the filter, as a zero-copy sequence."""
+        if category is None and difficulty is None:
+            return range(self._count)
+        if difficulty is not None:
+            difficulty = int(difficulty)
+            if not 0 < difficulty < N_DIFFICULTY:
+                return range(0)
+        if category is None:
+            offsets, postings = self._diff_post
+            key = difficulty
+        else:
+            cat_id = self._category_ids.get(category.strip().lower())
+            if cat_id is None:
+                return range(0)
+            if difficulty is None:
+                offsets, postings = self._cat_post
+                key = cat_id
+            else:
+                offsets, postings = self._pair_post
+                key = cat_id * N_DIFFICULTY + difficulty
+        return postings[offsets[key]:offsets[key + 1]]
+
+    def random_clue(self, difficulty=None, category=None):
+        rows = self.rows(difficulty, category)
+        if not len(rows):
+            return None
+        return self.clue(rows[random.randrange(len(rows))])
+
+    def random_clues(self, n, difficulty=None, category=None):
+        rows = self.rows(difficulty, category)
+        return [self.clue(rows[i]) for i in random.sample(range(len(rows)), min(n, len(rows)))]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python clue_archive.py <dump.csv|dump.jsonl> <out.jca>")
+    store = LocalClueStore.load(sys.argv[1])
+    build_archive(store, sys.argv[2])
+    print(f"Wrote {len(store)} clues to {sys.argv[2]}")
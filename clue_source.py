@@ -0,0 +1,268 @@
+import csv
+import json
+import os
+import random
+import re
+import threading
+
+from http_client import get_http_client
+from instrumentation import inc, timer
+from prefetch import PrefetchBuffer
+
+CLUEBASE_URL = "http://cluebase.lukelav.in"
+
+# Offline clue dump (CSV or JSONL) loaded into the in-process store
+CLUE_DUMP_ENV = "JEOPARDY_CLUE_DUMP"
+
+# Column names used by cluebase and by the common J! Archive CSV exports
+_FIELD_ALIASES = {
+    "id": ("id", "clue_id"),
+    "category": ("category",),
+    "clue": ("clue", "question"),
+    "response": ("response", "answer"),
+    "value": ("value",),
+    "difficulty": ("difficulty",),
+}
+
+
+def clue_difficulty(value):
+    """Maps a dollar value onto the 1-5 difficulty scale (200 points per level).
+    >>> [clue_difficulty(v) for v in (200, '$400', 1000, 2000, None, 'None')]
+    [1, 2, 5, 5, None, None]
+    """
+    if isinstance(value, str):
+        value = re.sub(r"[^\d]", "", value)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    if value <= 0:
+        return None
+    return max(1, min(5, value // 200))
+
+
+def make_clue(row, default_id=None):
+    """Normalizes a raw row (cluebase JSON, J! Archive CSV) into a clue dict."""
+    lowered = {str(k).strip().lower(): v for k, v in row.items()}
+    clue = {}
+    for field, names in _FIELD_ALIASES.items():
+        clue[field] = next((lowered[n] for n in names if lowered.get(n) not in (None, "")), None)
+    if clue["id"] is None:
+        clue["id"] = default_id
+    if clue["difficulty"] is None:
+        clue["difficulty"] = clue_difficulty(clue["value"])
+    else:
+        clue["difficulty"] = int(clue["difficulty"])
+    return clue
+
+
+def iter_clues(path):
+    """Streams the clues of a CSV or JSONL dump one at a time."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".json")):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for i, row in enumerate(rows):
+            yield make_clue(row, i)
+
+
+def _key(difficulty, category):
+    return (int(difficulty) if difficulty is not None else None,
+            category.strip().lower() if category is not None else None)
+
+
+class ClueSource(object):
+    """Something that can hand out random clues, optionally filtered."""
+
+    def random_clue(self, difficulty=None, category=None):
+        raise NotImplementedError
+
+    def cells(self):
+        """(difficulty, category) pairs that have clues; empty if not enumerable."""
+        return []
+
+    def random_clues(self, n, difficulty=None, category=None):
+        """Up to ``n`` random clues; sources override this with a bulk path."""
+        clues = []
+        for _ in range(n):
+            clue = self.random_clue(difficulty, category)
+            if clue is None:
+                break
+            clues.append(clue)
+        return clues
+
+
+class LocalClueStore(ClueSource):
+    """In-process clue store indexed by category and difficulty.
+
+    Every filter combination maps to a list of row numbers, so a random clue
+    is a single ``random.choice`` regardless of corpus size.
+    """
+
+    def __init__(self, clues=()):
+        self._clues = []
+        self._index = {}
+        for clue in clues:
+            self.add(clue)
+
+    def __len__(self):
+        return len(self._clues)
+
+    def __iter__(self):
+        return iter(self._clues)
+
+    def add(self, clue):
+        row = len(self._clues)
+        self._clues.append(clue)
+        difficulty, category = _key(clue["difficulty"], clue["category"] or "")
+        for key in ((None, None), (difficulty, None), (None, category), (difficulty, category)):
+            self._index.setdefault(key, []).append(row)
+
+    def add_many(self, clues):
+        for clue in clues:
+            self.add(clue)
+
+    def cells(self):
+        return [key for key in self._index if key[0] is not None and key[1] is not None]
+
+    def random_clue(self, difficulty=None, category=None):
+        rows = self._index.get(_key(difficulty, category))
+        if not rows:
+            return None
+        return self._clues[random.choice(rows)]
+
+    def random_clues(self, n, difficulty=None, category=None):
+        rows = self._index.get(_key(difficulty, category)) or []
+        return [self._clues[row] for row in random.sample(rows, min(n, len(rows)))]
+
+    @classmethod
+    def load(cls, path):
+        """Loads a CSV or JSONL clue dump."""
+        return cls(iter_clues(path))
+
+
+class RemoteClueSource(ClueSource):
+    """Fetches clues from the cluebase HTTP API through the shared HTTP client."""
+
+    def __init__(self, base_url=CLUEBASE_URL, client=None):
+        self.base_url = base_url
+        self.client = client or get_http_client()
+
+    def available(self):
+        return self.client.available(self.base_url)
+
+    def fetch(self, difficulty=None, category=None, limit=1):
+        # Filter values are quoted as cluebase expects; requests URL-encodes them,
+        # so category names with "&", "#" or "+" survive
+        params = {}
+        if category is not None:
+            params["category"] = f"'{category}'"
+        elif difficulty is not None:
+            params["difficulty"] = f"'{difficulty}'"
+        if limit > 1:
+            params["limit"] = limit
+
+        with timer("clue_fetch", source="cluebase"):
+            data = self.client.get_json(f"{self.base_url}/clues/random", params=params or None)
+        inc("clues_fetched", len(data['data']), source="cluebase")
+        return [make_clue(row) for row in data['data']]
+
+    def random_clue(self, difficulty=None, category=None):
+        clues = self.fetch(difficulty, category)
+        return clues[0] if clues else None
+
+    def random_clues(self, n, difficulty=None, category=None):
+        return self.fetch(difficulty, category, limit=n)
+
+
+class PrefetchingClueSource(ClueSource):
+    """Serves remote clues from a prefetch buffer refilled in the background.
+
+    Every fetched clue is also remembered in a fallback store (up to
+    ``max_remembered``), which answers when the buffer is empty and the
+    upstream's circuit breaker is open or the wait times out.  The fallback is
+    process-local by default, or a ``SharedClueStore`` shared by all workers.
+    """
+
+    def __init__(self, remote, fallback=None, depth=8, low_water=2, wait=10.0,
+                 max_remembered=10000):
+        self.remote = remote
+        self.fallback = fallback if fallback is not None else LocalClueStore()
+        self.wait = wait
+        self.max_remembered = max_remembered
+        self._buffer = PrefetchBuffer(self._fetch, depth, low_water)
+
+    def _fetch(self, key, limit=1):
+        clues = self.remote.fetch(*key, limit=limit)
+        room = self.max_remembered - len(self.fallback)
+        if room > 0:
+            self.fallback.add_many(clues[:room])
+        return clues
+
+    def prime(self, difficulty=None, category=None):
+        self._buffer.prime((difficulty, category))
+
+    def random_clue(self, difficulty=None, category=None):
+        key = (difficulty, category)
+        clue = self._buffer.get(key)
+        if clue is None and self.remote.available():
+            clue = self._buffer.get(key, timeout=self.wait)
+        if clue is None:
+            clue = self.fallback.random_clue(difficulty, category)
+        return clue
+
+    def random_clues(self, n, difficulty=None, category=None):
+        """Drains what the buffer has, then asks the upstream for the rest in one request."""
+        key = (difficulty, category)
+        clues = []
+        while len(clues) < n:
+            clue = self._buffer.get(key)
+            if clue is None:
+                break
+            clues.append(clue)
+        if len(clues) < n and self.remote.available():
+            try:
+                clues.extend(self._fetch(key, n - len(clues)))
+            except Exception:
+                inc("clue_fetch_failures", source="cluebase")
+        if len(clues) < n:
+            clues.extend(self.fallback.random_clues(n - len(clues), difficulty, category))
+        return clues[:n]
+
+
+_clue_source = None
+_clue_source_lock = threading.Lock()
+
+
+def get_clue_source():
+    """Returns the process-wide clue source.
+
+    With ``JEOPARDY_CLUE_DUMP`` pointing at a dump, clues are served from the
+    local store alone (memory-mapped for ``.jca`` archives built by
+    ``clue_archive.py``); otherwise cluebase is read through a prefetch buffer,
+    remembering clues in the shared store when ``JEOPARDY_SHARED_CACHE`` is set.
+    """
+    global _clue_source
+    with _clue_source_lock:
+        if _clue_source is None:
+            path = os.environ.get(CLUE_DUMP_ENV)
+            if path and path.endswith(".jca") and os.path.exists(path):
+                from clue_archive import ClueArchive
+                _clue_source = ClueArchive(path)
+            elif path and os.path.exists(path):
+                _clue_source = LocalClueStore.load(path)
+            else:
+                from shared_cache import SharedClueStore, shared_cache_path
+                shared = shared_cache_path("clues.sqlite")
+                _clue_source = PrefetchingClueSource(
+                    RemoteClueSource(), fallback=SharedClueStore(shared) if shared else None)
+                _clue_source.prime()
+        return _clue_source
+
+
+def set_clue_source(source):
+    """Replaces the process-wide clue source (e.g. with a store built in code)."""
+    global _clue_source
+    with _clue_source_lock:
+        _clue_source = source
@@ -0,0 +1,269 @@
+"""Near-duplicate detection for generated questions.
+
+ChatGPT at ``temperature=0.7`` keeps producing rewordings of the same clue
+("This river flows through Cairo" / "This river runs through Cairo").  Each
+clue is reduced to the set of character trigrams of its folded text, and the
+set to a MinHash signature: the fraction of positions where two signatures
+agree estimates the Jaccard similarity of the trigram sets.  Signatures live in one
+NumPy matrix, and locality-sensitive hashing over bands of the signature turns
+"which indexed clues look like this one" into a handful of binary searches, so
+a check stays well under a millisecond with the whole archive indexed.
+
+Many distinct clues share a template ("This river flows through Cairo" /
+"... through Paris") and so most of their trigrams.  Each clue also keeps its
+names and numbers (capitalized words past the start of a sentence, and words
+with digits); a candidate that swaps one of them for another is a different
+clue however similar the rest is.
+
+Trigram overlap catches rewordings that keep most of the words, not
+paraphrases that share none.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from normalize import fold
+from search_index import _search_text
+
+DUPLICATE_THRESHOLD = 0.5
+# Names and numbers kept per clue (the ones with the smallest hashes)
+ENTITIES = 4
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+# Words past the start of a sentence (possibly opening a quote), and words with digits
+_INNER_WORD = re.compile(r"(?<=[^\s.!?:])\s+[\"'(“‘]?([^\W\d_][\w'-]*)")
+_NUMBER = re.compile(r"\w*\d\w*")
+
+
+def _trigrams(text):
+    """Character trigrams of ``text`` as integers (exact, no hashing)."""
+    text = f" {_search_text(text)} "
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < 3:
+        return codes[:0]
+    # Code points are below 2**21, so three of them pack into one integer.
+    # Repeats are left in: they cannot change a minimum.
+    return (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+
+
+def _entities(text):
+    """Hashes of the names and numbers in ``text``, padded with zeros.
+    >>> a, b = _entities("This river flows through Cairo"), _entities("This river runs through Cairo.")
+    >>> a == b, a == _entities("This river flows through Paris"), _entities("this river")
+    (True, False, [0, 0, 0, 0])
+    """
+    words = _NUMBER.findall(text)
+    if not text.isupper():
+        words += [w for w in _INNER_WORD.findall(text) if w[0].isupper()]
+    found = sorted({zlib.crc32(fold(w).encode("utf-8")) | 1 for w in words})[:ENTITIES]
+    return found + [0] * (ENTITIES - len(found))
+
+
+class DedupIndex(object):
+    """MinHash/LSH index of clue texts answering "is this a near-duplicate?".
+
+    ``num_perm`` hash functions are split into ``bands`` bands; two clues become
+    candidates when any band matches, which happens with probability
+    ``1 - (1 - J**rows)**bands`` for trigram Jaccard similarity ``J``.
+    """
+
+    def __init__(self, texts=(), threshold=DUPLICATE_THRESHOLD, num_perm=48, bands=16, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.bands = bands
+        self._rows = num_perm // bands
+        # Multiply-shift hash functions: high half of a*x + b (mod 2**64), a odd
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 1 << 62, (bands, self._rows), dtype=np.uint64)
+        # The low 16 bits of each minimum are enough to estimate agreement
+        self._sigs = np.zeros((0, num_perm), dtype=np.uint16)
+        self._ents = np.zeros((0, ENTITIES), dtype=np.uint32)
+        self._size = 0
+        # Band keys of indexed clues: a sorted part for binary search and a
+        # short unsorted tail for recent additions, merged when it grows
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._ids = np.zeros(0, dtype=np.uint32)
+        self._tail_keys = np.zeros(0, dtype=np.uint64)
+        self._tail_ids = np.zeros(0, dtype=np.uint32)
+        self._lock = threading.Lock()
+        self.extend(texts)
+
+    def __len__(self):
+        return self._size
+
+    def _minhash(self, grams):
+        hashed = self._a[:, None] * grams[None, :]
+        hashed += self._b[:, None]
+        hashed >>= np.uint64(32)
+        return hashed
+
+    def signature(self, text):
+        """MinHash signature of ``text``, or None if it has no trigrams."""
+        grams = _trigrams(text)
+        if not len(grams):
+            return None
+        return self._minhash(grams).min(axis=1)
+
+    def _signatures(self, texts):
+        # One hashing pass over the concatenated trigrams of a chunk of texts,
+        # then a segmented minimum per text; texts without trigrams are skipped
+        kept = [(g, _entities(t)) for t, g in zip(texts, map(_trigrams, texts)) if len(g)]
+        if not kept:
+            return np.zeros((0, len(self._a)), dtype=np.uint64), np.zeros((0, ENTITIES), dtype=np.uint32)
+        grams = [g for g, _ in kept]
+        starts = np.cumsum([0] + [len(g) for g in grams[:-1]])
+        sigs = np.minimum.reduceat(self._minhash(np.concatenate(grams)), starts, axis=1).T
+        return sigs, np.array([e for _, e in kept], dtype=np.uint32)
+
+    def _band_keys(self, sigs):
+        bands = sigs.reshape(len(sigs), self.bands, self._rows)
+        keys = (bands * self._band_mix).sum(axis=2)
+        # Mix in the band number so equal values in different bands don't collide
+        return keys + np.arange(self.bands, dtype=np.uint64) * _MIX
+
+    def _grow(self, extra):
+        if self._size + extra > len(self._sigs):
+            sigs = np.zeros((max(2 * len(self._sigs), self._size + extra, 1024), self._sigs.shape[1]),
+                            dtype=np.uint16)
+            sigs[:self._size] = self._sigs[:self._size]
+            ents = np.zeros((len(sigs), ENTITIES), dtype=np.uint32)
+            ents[:self._size] = self._ents[:self._size]
+            self._sigs, self._ents = sigs, ents
+
+    def extend(self, texts):
+        """Indexes many clue texts at once (cheaper than repeated ``add``)."""
+        texts = list(texts)
+        if not texts:
+            return
+        chunks = [self._signatures(texts[i:i + 256]) for i in range(0, len(texts), 256)]
+        sigs = np.concatenate([sigs for sigs, _ in chunks])
+        if not len(sigs):
+            return
+        keys = self._band_keys(sigs)
+        with self._lock:
+            self._grow(len(sigs))
+            ids = np.arange(self._size, self._size + len(sigs), dtype=np.uint32)
+            self._sigs[ids] = sigs & np.uint64(0xFFFF)
+            self._ents[ids] = np.concatenate([ents for _, ents in chunks])
+            self._size += len(sigs)
+            self._merge(keys.ravel(), np.repeat(ids, self.bands))
+
+    def _merge(self, keys, ids):
+        keys = np.concatenate([keys, self._tail_keys])
+        ids = np.concatenate([ids, self._tail_ids])
+        order = np.argsort(keys, kind="stable")
+        # Inserting the sorted newcomers copies the big arrays once instead of re-sorting them
+        at = np.searchsorted(self._keys, keys[order])
+        self._keys = np.insert(self._keys, at, keys[order])
+        self._ids = np.insert(self._ids, at, ids[order])
+        self._tail_keys = self._tail_keys[:0]
+        self._tail_ids = self._tail_ids[:0]
+
+    def add(self, text):
+        """Indexes one clue text."""
+        sig = self.signature(text)
+        if sig is None:
+            return
+        keys = self._band_keys(sig[None, :])[0]
+        with self._lock:
+            self._add(sig, _entities(text), keys)
+
+    def _add(self, sig, ents, keys):
+        self._grow(1)
+        self._sigs[self._size] = sig & np.uint64(0xFFFF)
+        self._ents[self._size] = ents
+        self._tail_keys = np.concatenate([self._tail_keys, keys])
+        self._tail_ids = np.concatenate([self._tail_ids, np.full(self.bands, self._size, dtype=np.uint32)])
+        self._size += 1
+        if len(self._tail_keys) > 4096:
+            self._merge(self._keys[:0], self._ids[:0])
+
+    def _similarity(self, sig, ents, keys):
+        lo = np.searchsorted(self._keys, keys, side="left")
+        hi = np.searchsorted(self._keys, keys, side="right")
+        found = [self._ids[l:h] for l, h in zip(lo, hi) if h > l]
+        if len(self._tail_keys):
+            found.append(self._tail_ids[np.isin(self._tail_keys, keys)])
+        ids = np.unique(np.concatenate(found)) if found else found
+        if not len(ids):
+            return 0.0, None
+        scores = (self._sigs[ids] == (sig & np.uint64(0xFFFF))).mean(axis=1)
+        names = set(ents) - {0}
+        for best in np.argsort(-scores, kind="stable"):
+            other = set(self._ents[ids[best]].tolist()) - {0}
+            # Same template, each with a name the other lacks: not a rewording
+            if not (names - other and other - names):
+                return float(scores[best]), int(ids[best])
+        return 0.0, None
+
+    def nearest(self, text):
+        """``(similarity, id)`` of the most similar indexed clue that ``text`` could be a
+        rewording of, ``(0.0, None)`` if none is close.
+        >>> index = DedupIndex(["This river flows through Cairo", "This band recorded Abbey Road"])
+        >>> index.nearest("This river flows through Cairo!")
+        (1.0, 0)
+        >>> index.nearest("The smallest prime number")
+        (0.0, None)
+        >>> index.nearest("This river flows through Paris")
+        (0.0, None)
+        """
+        sig = self.signature(text)
+        if sig is None:
+            return 0.0, None
+        keys = self._band_keys(sig[None, :])[0]
+        with self._lock:
+            return self._similarity(sig, _entities(text), keys)
+
+    def is_duplicate(self, text, threshold=None):
+        """True if an indexed clue is at least ``threshold`` similar to ``text``."""
+        return self.nearest(text)[0] >= (self.threshold if threshold is None else threshold)
+
+    def add_if_new(self, text, threshold=None):
+        """Indexes ``text`` unless it is a near-duplicate; True if it was new.
+
+        Check and insert happen under one lock, so two threads offering
+        rewordings of the same clue cannot both get it in.
+        >>> index = DedupIndex()
+        >>> index.add_if_new("This river flows through Cairo"), index.add_if_new("this river flows thru Cairo")
+        (True, False)
+        """
+        sig = self.signature(text)
+        if sig is None:
+            return True
+        keys = self._band_keys(sig[None, :])[0]
+        ents = _entities(text)
+        with self._lock:
+            if self._similarity(sig, ents, keys)[0] >= (self.threshold if threshold is None else threshold):
+                return False
+            self._add(sig, ents, keys)
+            return True
+
+
+_archive_index = None
+_archive_index_lock = threading.Lock()
+
+
+def get_archive_index():
+    """Returns the process-wide index over the clue source's clue texts, built on first use.
+
+    Like the search index, it is rebuilt once the remote source's store of
+    remembered clues has doubled.
+    """
+    global _archive_index
+    from clue_source import get_clue_source
+
+    with _archive_index_lock:
+        source = get_clue_source()
+        store = getattr(source, "fallback", source)
+        try:
+            size = len(store)
+        except TypeError:
+            size = 0
+        if _archive_index is None or (store is not source and size >= 2 * max(len(_archive_index), 100)):
+            _archive_index = DedupIndex(clue["clue"] for clue in store) if size else DedupIndex()
+    return _archive_index
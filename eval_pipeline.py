@@ -0,0 +1,250 @@
+"""Offline evaluation of the answering paths over a whole clue dump.
+
+Clues stream from a CSV, JSONL or .jca dump through generator stages
+
+    read -> skip done -> normalize -> prompt -> LLM -> grade -> sink
+
+so memory stays bounded by the calls in flight, not the size of the dump.
+A setup is a model name for the plain completion path (what
+``get_jeopardy_response_from_llm_no_chain`` does) or ``agent:<model>`` for the
+``agent.run`` chain path, as in model_compare.py.
+
+Each graded clue is appended to the results file as soon as it finishes, and
+that file is the checkpoint: a rerun reads it back, skips every (setup, clue)
+already answered and carries on where the last run stopped.  A line torn by a
+crash is trimmed.  Calls that still fail after their retries (rate limits,
+timeouts) are recorded with the error and tried again on the next run.
+
+    python eval_pipeline.py clues.jsonl --out eval.jsonl
+    python eval_pipeline.py clues.jsonl --setups stub:0.9:0,agent:stub:0.6:0   # offline
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from clue_source import iter_clues
+from grading import grade_batch
+from instrumentation import Histogram
+from model_compare import _ask, teach_stubs
+from prompts import render
+from registry import DEFAULT_MODEL
+
+DEFAULT_SETUPS = (DEFAULT_MODEL, f"agent:{DEFAULT_MODEL}")
+
+
+def read_clues(path):
+    if path.endswith(".jca"):
+        from clue_archive import ClueArchive
+        return iter(ClueArchive(path))
+    return iter_clues(path)
+
+
+def _key(setup, clue_id):
+    return f"{setup}\x1f{clue_id}"
+
+
+class Summary(object):
+    """Running accuracy per setup and per (setup, category), and this run's throughput.
+
+    Accuracy is over answered clues; calls that failed are counted as errors.
+    """
+
+    def __init__(self):
+        self.setups = {}
+        self.categories = {}
+        self.errors = {}
+        self.latency = {}
+        self.new = 0
+        self.start = time.perf_counter()
+
+    def add(self, row, new=True):
+        if row["error"] is not None:
+            self.errors[row["setup"]] = self.errors.get(row["setup"], 0) + 1
+        else:
+            for table, key in ((self.setups, row["setup"]), (self.categories, (row["setup"], row["category"]))):
+                counts = table.setdefault(key, [0, 0])
+                counts[0] += 1
+                counts[1] += bool(row["correct"])
+        if new:
+            self.new += 1
+            self.latency.setdefault(row["setup"], Histogram()).observe(row["latency"])
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        report = {"new_rows": self.new, "elapsed": elapsed,
+                  "rows_per_sec": self.new / elapsed if elapsed else 0.0, "setups": {}}
+        for setup in sorted(set(self.setups) | set(self.errors)):
+            n, correct = self.setups.get(setup, (0, 0))
+            latency = self.latency.get(setup, Histogram())
+            report["setups"][setup] = {
+                "clues": n,
+                "accuracy": correct / n if n else 0.0,
+                "errors": self.errors.get(setup, 0),
+                "p50_latency": latency.quantile(0.5),
+                "p95_latency": latency.quantile(0.95),
+                "categories": {category: {"clues": c[0], "accuracy": c[1] / c[0]}
+                               for (s, category), c in self.categories.items() if s == setup},
+            }
+        return report
+
+
+def load_checkpoint(path, summary):
+    """Keys of the (setup, clue) pairs already answered in ``path``.
+
+    Rows are also counted into ``summary``, so the final report covers every
+    run.  A torn last line is cut off so new rows start on a line of their own.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb+") as f:
+        end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            # Failed calls are retried, so only successes count as done
+            if row.get("error") is None:
+                done.add(_key(row["setup"], row["id"]))
+                summary.add(row, new=False)
+        f.truncate(end)
+    return done
+
+
+def pending(clues, setups, done):
+    for clue in clues:
+        for setup in setups:
+            if _key(setup, clue["id"]) not in done:
+                yield setup, clue
+
+
+def normalized(items):
+    """Drops clues without text or answer and tidies whitespace."""
+    for setup, clue in items:
+        text, answer = " ".join((clue["clue"] or "").split()), (clue["response"] or "").strip()
+        if not text or not answer:
+            continue
+        clue = dict(clue, clue=text, response=answer, category=" ".join((clue["category"] or "").split()))
+        teach_stubs((setup,), text, answer)
+        yield setup, clue
+
+
+def prompted(items):
+    for setup, clue in items:
+        template = "agent_answer" if setup.startswith("agent:") else "answer"
+        yield setup, clue, render(template, category=clue["category"], clue=clue["clue"])
+
+
+def _answer(setup, clue, prompt, tools, retries, backoff):
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            response, tokens, cost = _ask(setup, prompt, tools)
+            error = None
+            break
+        except Exception as exc:
+            response, tokens, cost, error = "", 0, 0.0, repr(exc)
+            if attempt < retries:
+                time.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+    return {
+        "setup": setup,
+        "id": clue["id"],
+        "category": clue["category"],
+        "difficulty": clue.get("difficulty"),
+        "clue": clue["clue"],
+        "answer": clue["response"],
+        "response": response.strip(),
+        "latency": time.perf_counter() - start,
+        "attempts": attempt + 1,
+        "tokens": tokens,
+        "cost": cost,
+        "error": error,
+    }
+
+
+def answered(items, concurrency=8, tools=("serpapi",), retries=3, backoff=1.0):
+    """Runs the LLM calls on a thread pool, at most ``2 * concurrency`` in flight.
+
+    Yields lists of the rows that finished together, in completion order.
+    """
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="eval") as pool:
+        inflight = set()
+        for setup, clue, prompt in items:
+            inflight.add(pool.submit(_answer, setup, clue, prompt, tuple(tools), retries, backoff))
+            if len(inflight) >= 2 * concurrency:
+                finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                yield [future.result() for future in finished]
+        while inflight:
+            finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            yield [future.result() for future in finished]
+
+
+def graded(batches):
+    """Grades each batch of rows in one ``grade_batch`` call; yields the rows."""
+    for rows in batches:
+        _, correct = grade_batch([row["response"] for row in rows], [row["answer"] for row in rows],
+                                 [row["clue"] for row in rows])
+        for row, right in zip(rows, correct):
+            row["correct"] = row["error"] is None and bool(right)
+            yield row
+
+
+def sink(rows, out, summary):
+    for row in rows:
+        out.write(json.dumps(row) + "\n")
+        out.flush()
+        summary.add(row)
+
+
+def run(dump, setups, out_path, concurrency=8, limit=None, tools=("serpapi",), retries=3):
+    """Evaluates every setup on every clue of ``dump`` not yet in ``out_path``; returns the Summary."""
+    summary = Summary()
+    done = load_checkpoint(out_path, summary)
+    clues = read_clues(dump)
+    if limit is not None:
+        clues = (clue for _, clue in zip(range(limit), clues))
+    rows = graded(answered(prompted(normalized(pending(clues, setups, done))),
+                           concurrency, tools, retries))
+    with open(out_path, "a", encoding="utf-8") as out:
+        sink(rows, out, summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dump", help="CSV, JSONL or .jca clue dump")
+    parser.add_argument("--setups", default=",".join(DEFAULT_SETUPS),
+                        help="comma-separated setups (model, agent:<model>, stub[:acc[:latency]])")
+    parser.add_argument("--out", default="eval_results.jsonl", help="results file, also the checkpoint")
+    parser.add_argument("--summary", help="write the full report, with every category, to this JSON file")
+    parser.add_argument("-n", "--num-clues", type=int, help="only the first N clues of the dump")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="categories to print per setup")
+    args = parser.parse_args(argv)
+
+    setups = [s.strip() for s in args.setups.split(",") if s.strip()]
+    report = run(args.dump, setups, args.out, args.concurrency, args.num_clues,
+                 retries=args.retries).report()
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(f"{report['new_rows']} new rows in {report['elapsed']:.1f}s "
+          f"({report['rows_per_sec']:.1f} rows/s)")
+    for setup, stats in report["setups"].items():
+        print(f"{setup}: {stats['accuracy']:.1%} of {stats['clues']} clues, {stats['errors']} errors, "
+              f"p50 {stats['p50_latency']}s p95 {stats['p95_latency']}s")
+        categories = sorted(stats["categories"].items(), key=lambda item: -item[1]["clues"])
+        for category, c in categories[:args.top]:
+            print(f"  {category[:40]:40}  {c['accuracy']:6.1%} of {c['clues']}")
+
+
+if __name__ == "__main__":
+    main()
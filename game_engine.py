@@ -0,0 +1,58 @@
+"""Game rules shared by the pages and the headless simulator.
+
+The functions operate on any object with ``points``, ``nq``, ``answered`` and
+``totq`` attributes: ``st.session_state`` in the app, ``GameState`` elsewhere.
+"""
+from alias_index import get_alias_index
+from instrumentation import timer
+
+
+class GameState(object):
+    """Plain attribute container with the same fields as the pages' session state."""
+
+    def __init__(self, totq=6):
+        self.totq = totq
+        reset_score(self)
+
+
+def reset_score(state):
+    # Track number of points scored in a game
+    state.points = 0
+    # Track total number of questions received in a game
+    state.nq = 0
+    # Track number of questions answered correctly in a game
+    state.answered = 0
+
+
+def grade_response(response, answer, clue=None):
+    """Returns True if ``response`` matches any acceptable alias of ``answer``.
+
+    Pass the ``clue`` when there is one: a clue about a person ("this man")
+    lets the surname alone count for names the alias index doesn't know.
+    >>> grade_response('the beatles', 'The Beatles')
+    True
+    >>> grade_response('lincoln', 'Abraham Lincoln')
+    True
+    >>> grade_response('john', 'John Adams')
+    False
+    """
+    with timer("grade"):
+        return get_alias_index().is_correct(response, answer, clue)
+
+
+def record_answer(state, correct, value):
+    """Scores one question: +value if correct, -value otherwise."""
+    if correct:
+        state.points += value
+        state.answered += 1
+    else:
+        state.points -= value
+    state.nq += 1
+
+
+def is_game_over(state):
+    return state.nq >= state.totq
+
+
+def score_line(state):
+    return f"{state.points} ({state.answered}/{state.nq})"
@@ -0,0 +1,108 @@
+"""Batch StrikeAMatch (Dice bigram) grading on NumPy arrays.
+
+``similarity_batch`` returns exactly what ``compare_strings`` would for each
+(response, answer) pair, but encodes every bigram as an integer code and
+computes all multiset intersections with a handful of array operations instead
+of a Python dict walk per pair.  ``grade_batch`` grades with it the way the
+game does, for the batch evaluators (``llm_batch``, ``eval_pipeline``).
+"""
+import numpy as np
+
+from alias_index import get_alias_index
+from normalize import normalize_answer
+
+# Code points fit in 21 bits, so a bigram packs into 42 bits and the row number
+# of the pair it belongs to goes in the bits above that.
+_CHAR_BITS = 21
+_ROW_SHIFT = 2 * _CHAR_BITS
+_MAX_ROWS = 1 << (63 - _ROW_SHIFT)
+_SPACE = ord(" ")
+
+
+def _keyed_counts(texts):
+    """Unique (row, bigram) keys with their multiplicities, plus per-row sizes.
+
+    Mirrors ``_get_character_pairs``: upper-cased, split on whitespace, one
+    pair per adjacent character inside a word (duplicates counted).  All texts
+    are joined with single spaces and decoded as one UTF-32 array, so bigram
+    extraction happens without a Python-level loop over characters.
+    """
+    words = []
+    for text in texts:
+        if not hasattr(text, "upper"):
+            raise ValueError("Invalid argument")
+        words.append(" ".join(text.upper().split()))
+    lengths = np.fromiter((len(w) + 1 for w in words), dtype=np.int64, count=len(words))
+    chars = np.frombuffer(" ".join(words).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    rows = np.repeat(np.arange(len(words), dtype=np.int64), lengths)[:len(chars)]
+
+    first, second = chars[:-1], chars[1:]
+    inside = (first != _SPACE) & (second != _SPACE)
+    pair_rows = rows[:-1][inside]
+    codes = (first[inside] << _CHAR_BITS) | second[inside]
+    sizes = np.bincount(pair_rows, minlength=len(words))
+    keys, counts = np.unique((pair_rows << _ROW_SHIFT) | codes, return_counts=True)
+    return keys, counts, sizes
+
+
+def similarity_batch(responses, answers):
+    """Returns an array of Dice similarities, one per (response, answer) pair.
+    >>> words = ('Sealed', 'Healthy', 'Heard', 'Herded', 'Help', 'Sold')
+    >>> similarity_batch(['Healed'] * len(words), words).tolist()
+    [0.8, 0.5454545454545454, 0.4444444444444444, 0.4, 0.25, 0.0]
+    >>> similarity_batch(['Horse', 'Horse BOX'], ['Horse box', 'Horse box']).tolist()
+    [0.8, 1.0]
+
+    Pairs where neither side has a bigram score 0.0 (``compare_strings``
+    raises ZeroDivisionError there).
+    """
+    responses, answers = list(responses), list(answers)
+    if len(responses) != len(answers):
+        raise ValueError("responses and answers must have the same length")
+    n = len(responses)
+    scores = np.zeros(n, dtype=np.float64)
+    for start in range(0, n, _MAX_ROWS):
+        stop = min(n, start + _MAX_ROWS)
+        keys_a, counts_a, sizes_a = _keyed_counts(responses[start:stop])
+        keys_b, counts_b, sizes_b = _keyed_counts(answers[start:stop])
+        common, ia, ib = np.intersect1d(keys_a, keys_b, assume_unique=True, return_indices=True)
+        overlap = np.minimum(counts_a[ia], counts_b[ib])
+        intersection = np.bincount(common >> _ROW_SHIFT, weights=overlap, minlength=stop - start)
+        total = (sizes_a + sizes_b).astype(np.float64)
+        np.divide(2.0 * intersection, total, out=scores[start:stop], where=total > 0)
+    return scores
+
+
+def grade_batch(responses, answers, clues=None):
+    """Grades a batch the way the game does; returns (scores, correct).
+
+    Each response is normalized and matched against every alias of its answer
+    (see ``alias_index``), so ``correct[i]`` is exactly
+    ``game_engine.grade_response(responses[i], answers[i], clues[i])``; only
+    the Dice scores of all the (response, alias) pairs are computed at once.
+    >>> scores, correct = grade_batch(['lincoln', 'paris', 'the beatles'],
+    ...                               ['Abraham Lincoln', 'London', 'The Beatles'])
+    >>> [bool(c) for c in correct]
+    [True, False, True]
+    """
+    responses, answers = list(responses), list(answers)
+    clues = [None] * len(answers) if clues is None else list(clues)
+    if not len(responses) == len(answers) == len(clues):
+        raise ValueError("responses, answers and clues must have the same length")
+    index = get_alias_index()
+    scores = np.zeros(len(responses), dtype=np.float64)
+    texts, aliases, rows = [], [], []
+    for row, (response, answer, clue) in enumerate(zip(responses, answers, clues)):
+        text = normalize_answer(response)
+        candidates = [alias.text for alias in index.aliases(answer, clue)]
+        if not text or not candidates:
+            continue
+        if text in candidates:
+            scores[row] = 1.0
+            continue
+        texts.extend([text] * len(candidates))
+        aliases.extend(candidates)
+        rows.extend([row] * len(candidates))
+    if rows:
+        np.maximum.at(scores, rows, similarity_batch(texts, aliases))
+    return scores, scores >= index.threshold
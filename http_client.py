@@ -0,0 +1,123 @@
+"""Shared HTTP client for cluebase and other upstreams.
+
+One pooled ``requests.Session`` per process (keep-alive, bounded connections
+per host), connect/read timeouts on every call, retries with full jitter on
+connection errors and 5xx responses, and a per-host circuit breaker so a dead
+upstream fails fast instead of tying up Streamlit workers.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(Exception):
+    """Raised without touching the network while a host's breaker is open."""
+
+
+class CircuitBreaker(object):
+    """Opens after ``failure_threshold`` consecutive failures; lets one probe
+    request through after ``reset_timeout`` seconds."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "half-open":
+                # Let exactly one probe through until it reports back
+                self.opened_at = time.monotonic()
+                return True
+            return state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class HttpClient(object):
+    def __init__(self, max_per_host=8, connect_timeout=3.05, read_timeout=10.0,
+                 retries=2, backoff=0.25, failure_threshold=5, reset_timeout=30.0):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.session = requests.Session()
+        # pool_block caps concurrent connections per host instead of opening
+        # (and then discarding) extra ones under load
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_per_host, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def available(self, url):
+        """False while the breaker for ``url``'s host is open."""
+        return self.breaker(url).state != "open"
+
+    def get(self, url, **kwargs):
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{urlsplit(url).netloc} is failing; not calling it for now")
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, **kwargs)
+                if response.status_code < 500:
+                    breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f"{response.status_code} from {url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = exc
+            if attempt < self.retries:
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        breaker.record_failure()
+        raise error
+
+    def get_json(self, url, **kwargs):
+        return self.get(url, **kwargs).json()
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Returns the process-wide HTTP client."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+        return _http_client
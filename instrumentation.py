@@ -0,0 +1,173 @@
+"""Lightweight in-process metrics: timers, counters and latency histograms.
+
+    with timer("llm_call", model="gpt-3.5-turbo"):
+        ...
+    inc("clue_fetch_empty")
+
+Metrics aggregate in memory and can be exported as Prometheus text on a local
+port (``JEOPARDY_METRICS_PORT``) and/or appended as periodic snapshots to a
+rolling JSONL file (``JEOPARDY_METRICS_JSONL``).
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT_ENV = "JEOPARDY_METRICS_PORT"
+METRICS_JSONL_ENV = "JEOPARDY_METRICS_JSONL"
+
+# Seconds; spans in-process lookups (~1e-5) up to slow LLM/agent calls
+BUCKETS = (0.00001, 0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram(object):
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction ``q`` of observations fall."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target and count:
+                return bound
+        return 0.0
+
+
+class Metrics(object):
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "time": time.time(),
+                "histograms": [
+                    {"name": name, "labels": dict(labels), "count": h.count, "sum": h.total,
+                     "p50": h.quantile(0.5), "p95": h.quantile(0.95), "buckets": list(h.counts)}
+                    for (name, labels), h in self.histograms.items()],
+                "counters": [{"name": name, "labels": dict(labels), "value": v}
+                             for (name, labels), v in self.counters.items()],
+            }
+
+    def prometheus_text(self):
+        def fmt(labels, extra=()):
+            items = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}" if items else ""
+
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"jeopardy_{name}_total{fmt(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items()):
+                metric = f"jeopardy_{name}_seconds"
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{metric}_bucket{fmt(labels, [('le', '+Inf')])} {h.count}")
+                lines.append(f"{metric}_sum{fmt(labels)} {h.total}")
+                lines.append(f"{metric}_count{fmt(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def timer(name, **labels):
+    """Times the block into the ``name`` histogram (errors are counted too)."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metrics.inc(name + "_errors", **labels)
+        raise
+    finally:
+        metrics.observe(name, time.perf_counter() - start, **labels)
+
+
+def inc(name, value=1, **labels):
+    metrics.inc(name, value, **labels)
+
+
+class _PrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _write_snapshots(path, interval, max_bytes):
+    while True:
+        time.sleep(interval)
+        if os.path.exists(path) and os.path.getsize(path) > max_bytes:
+            os.replace(path, path + ".1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(metrics.snapshot()) + "\n")
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters(interval=15.0, max_bytes=10 * 1024 * 1024):
+    """Starts the exporters configured in the environment (once per process)."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    port = os.environ.get(METRICS_PORT_ENV)
+    if port:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", int(port)), _PrometheusHandler)
+        except OSError as exc:
+            logger.warning("Metrics endpoint not started on port %s: %s", port, exc)
+        else:
+            threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    path = os.environ.get(METRICS_JSONL_ENV)
+    if path:
+        threading.Thread(target=_write_snapshots, args=(path, interval, max_bytes),
+                         daemon=True, name="metrics-jsonl").start()
@@ -0,0 +1,68 @@
+"""Tolerant, incremental extraction of JSON objects from LLM output.
+
+LLMs asked for JSON still wrap it in prose, use Python-style single quotes or
+stop mid-array when they hit the token limit.  ``ObjectStream`` scans text as
+it arrives and yields every complete top-level ``{...}`` object it can parse,
+skipping anything malformed, so one bad or truncated item never costs the
+rest of the batch.
+"""
+import ast
+import json
+
+
+def _load(text):
+    try:
+        obj = json.loads(text)
+    except ValueError:
+        try:
+            obj = ast.literal_eval(text)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return None
+    return obj if isinstance(obj, dict) else None
+
+
+class ObjectStream(object):
+    """Feed text chunks in, get parsed dicts out."""
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._quote = None
+        self._escape = False
+
+    def feed(self, chunk):
+        """Consumes ``chunk`` and returns the objects it completed."""
+        found = []
+        for ch in chunk:
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer = [ch]
+                continue
+            self._buffer.append(ch)
+            if self._quote is not None:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+            elif ch in "\"'":
+                self._quote = ch
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = _load("".join(self._buffer))
+                    if obj is not None:
+                        found.append(obj)
+        return found
+
+
+def parse_objects(text):
+    """Returns every parseable top-level object in ``text``.
+    >>> parse_objects('Sure! [{"a": 1}, {\\'b\\': "it\\'s"}, {"c": ')
+    [{'a': 1}, {'b': "it's"}]
+    """
+    return ObjectStream().feed(text)
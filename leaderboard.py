@@ -0,0 +1,220 @@
+"""Persistent game history and leaderboard.
+
+Every graded question is appended to an event log in SQLite (WAL mode).
+Next to the log the store keeps aggregates, and they are updated in the same
+transaction as the events they summarize:
+
+* per-contestant points/correct/total, summed across rounds and game modes;
+* per-category accuracy;
+* per-model accuracy for questions answered by an LLM.
+
+``record()`` only updates an in-memory copy of the aggregates and queues the
+event, so it costs the render path nothing. A background thread writes
+queued events in batches and periodically reloads the aggregates, which picks
+up writes from other workers sharing the file. Reads are served from memory
+and never rescan the log.
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from instrumentation import inc
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_ENV = "JEOPARDY_LEADERBOARD"
+KINDS = ("contestant", "category", "model")
+
+
+def new_game_id():
+    return uuid.uuid4().hex
+
+
+class Leaderboard(object):
+    """Event log plus incrementally maintained aggregates.
+
+    Aggregates are ``{(kind, name): [points, correct, total]}``. ``_flushed``
+    mirrors the database and ``_pending`` holds events not yet written, so
+    a contestant's own result shows up before it reaches disk.  Sorted views
+    for ``top`` are kept in ``_views`` until the aggregates next change.
+    """
+
+    def __init__(self, path, batch_size=256, refresh_interval=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self._flushed = {}
+        self._pending = {}
+        self._views = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS events ("
+                         "id INTEGER PRIMARY KEY, ts REAL NOT NULL, game_id TEXT, mode TEXT, "
+                         "contestant TEXT, category TEXT, model TEXT, "
+                         "correct INTEGER NOT NULL, value INTEGER NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS events_contestant ON events(contestant, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS aggregates ("
+                         "kind TEXT NOT NULL, name TEXT NOT NULL, points INTEGER NOT NULL, "
+                         "correct INTEGER NOT NULL, total INTEGER NOT NULL, "
+                         "PRIMARY KEY (kind, name))")
+        self._reload()
+        self._writer = threading.Thread(target=self._run, daemon=True, name="leaderboard-writer")
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _deltas(event):
+        points = event["value"] if event["correct"] else -event["value"]
+        correct = 1 if event["correct"] else 0
+        for kind in KINDS:
+            if event[kind]:
+                yield (kind, event[kind]), (points, correct, 1)
+
+    @staticmethod
+    def _apply(aggregates, key, delta, sign=1):
+        row = aggregates.setdefault(key, [0, 0, 0])
+        for i, d in enumerate(delta):
+            row[i] += sign * d
+
+    def record(self, mode, contestant, category, correct, value, model=None, game_id=None):
+        """Queues one graded question; returns immediately."""
+        event = {"ts": time.time(), "game_id": game_id, "mode": mode, "contestant": contestant,
+                 "category": category, "model": model, "correct": bool(correct),
+                 "value": int(value)}
+        with self._lock:
+            for key, delta in self._deltas(event):
+                self._apply(self._pending, key, delta)
+            self._views.clear()
+        self._queue.put(event)
+
+    def flush(self):
+        """Blocks until every queued event has been written."""
+        self._queue.join()
+
+    def _run(self):
+        last_reload = time.monotonic()
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.refresh_interval)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+            if time.monotonic() - last_reload >= self.refresh_interval:
+                self._reload()
+                last_reload = time.monotonic()
+
+    def _write(self, batch):
+        totals = {}
+        for event in batch:
+            for key, delta in self._deltas(event):
+                self._apply(totals, key, delta)
+        written = True
+        try:
+            self._insert(batch, totals)
+        except sqlite3.Error as exc:
+            logger.warning("Leaderboard write of %d events failed: %s", len(batch), exc)
+            inc("leaderboard_write_failures")
+            written = False
+        with self._lock:
+            for key, row in totals.items():
+                self._apply(self._pending, key, row, -1)
+                if written:
+                    self._apply(self._flushed, key, row)
+            self._views.clear()
+
+    def _insert(self, batch, totals):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO events (ts, game_id, mode, contestant, category, model, correct, value) "
+                "VALUES (:ts, :game_id, :mode, :contestant, :category, :model, :correct, :value)",
+                batch)
+            conn.executemany(
+                "INSERT INTO aggregates VALUES (?, ?, ?, ?, ?) ON CONFLICT (kind, name) DO UPDATE SET "
+                "points = points + excluded.points, correct = correct + excluded.correct, "
+                "total = total + excluded.total",
+                [key + tuple(row) for key, row in totals.items()])
+
+    def _reload(self):
+        rows = self._connect().execute("SELECT kind, name, points, correct, total FROM aggregates")
+        flushed = {(kind, name): [points, correct, total] for kind, name, points, correct, total in rows}
+        with self._lock:
+            if flushed != self._flushed:
+                self._flushed = flushed
+                self._views.clear()
+
+    def _stats(self, key):
+        row = [a + b for a, b in zip(self._flushed.get(key, (0, 0, 0)), self._pending.get(key, (0, 0, 0)))]
+        return {"points": row[0], "correct": row[1], "total": row[2],
+                "accuracy": row[1] / row[2] if row[2] else None}
+
+    def stats(self, kind, name):
+        """``{"points", "correct", "total", "accuracy"}`` for one contestant/category/model."""
+        with self._lock:
+            return self._stats((kind, name))
+
+    def top(self, kind="contestant", n=10, by="points"):
+        """The ``n`` best names of ``kind`` by points or accuracy, with their stats.
+
+        Every name of ``kind`` is sorted once per change to the aggregates;
+        calls in between only slice that view.
+        """
+        with self._lock:
+            view = self._views.get((kind, by))
+            if view is None:
+                names = {name for k, name in self._flushed if k == kind}
+                names.update(name for k, name in self._pending if k == kind)
+                rows = [dict(name=name, **self._stats((kind, name))) for name in names]
+                view = self._views[(kind, by)] = sorted(rows, key=lambda row: row[by] or 0, reverse=True)
+        return [dict(row) for row in view[:n]]
+
+    def history(self, contestant, limit=20):
+        """The contestant's most recent written events, newest first."""
+        rows = self._connect().execute(
+            "SELECT ts, game_id, mode, category, model, correct, value FROM events "
+            "WHERE contestant = ? ORDER BY id DESC LIMIT ?", (contestant, limit))
+        return [dict(zip(("ts", "game_id", "mode", "category", "model", "correct", "value"), row))
+                for row in rows]
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard():
+    """Returns the process-wide leaderboard.
+
+    The store is ``JEOPARDY_LEADERBOARD`` if set, else ``leaderboard.sqlite`` in
+    the shared cache directory (see shared_cache.py) or the working directory.
+    """
+    global _leaderboard
+    with _leaderboard_lock:
+        if _leaderboard is None:
+            from shared_cache import shared_cache_path
+            path = (os.environ.get(LEADERBOARD_ENV) or shared_cache_path("leaderboard.sqlite")
+                    or "leaderboard.sqlite")
+            _leaderboard = Leaderboard(path)
+    return _leaderboard
@@ -0,0 +1,274 @@
+"""Headless ChatGPT vs Archive batch runs.
+
+Pulls N clues, asks the LLM for each one concurrently (bounded by a
+concurrency limit and a token-per-minute budget, with retry/backoff), grades
+every response the same way the ChatGPT vs Archive page does and streams one
+JSON line per clue to the report file.
+
+    python llm_batch.py -n 500 --concurrency 16 --tpm 90000 --out report.jsonl
+    python llm_batch.py -n 500 --model stub      # offline, no API key needed
+    python llm_batch.py -n 500 --dump clues.jca --schedule explore
+
+With ``--schedule explore`` clues are not drawn uniformly: each one comes from
+the category/difficulty cell where the model's accuracy is least certain given
+the answers so far (see scheduler.py), so per-category estimates converge with
+fewer calls.
+
+With ``--pack 10`` up to ten clues share one completion (see prompts.py), as
+long as the request stays within ``--budget`` tokens.  The instructions are
+then sent once per request instead of once per clue; the summary reports the
+prompt tokens spent and saved per clue.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from clue_source import LocalClueStore, get_clue_source
+from grading import grade_batch
+from prompts import ANSWER_TOKENS, batches, estimate_tokens, pack, render, unpack
+from registry import DEFAULT_MODEL
+
+
+class TokenBucket(object):
+    """Async token-per-minute limiter."""
+
+    def __init__(self, tokens_per_minute):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = tokens_per_minute
+        self.tokens = tokens_per_minute
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, n):
+        n = min(n, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+
+async def _call_llm(llm, prompt):
+    """Returns (completion, prompt tokens, completion tokens).
+
+    OpenAI models report usage through a per-call OpenAICallbackHandler (the
+    fields ``get_openai_callback`` exposes); for stubs it is estimated.
+    """
+    if hasattr(llm, "agenerate"):
+        from langchain.callbacks.openai_info import OpenAICallbackHandler
+        usage = OpenAICallbackHandler()
+        result = await llm.agenerate([prompt], callbacks=[usage])
+        return result.generations[0][0].text, usage.prompt_tokens, usage.completion_tokens
+    if hasattr(llm, "acall"):
+        response = await llm.acall(prompt)
+    else:
+        response = await asyncio.to_thread(llm, prompt)
+    return response, estimate_tokens(prompt), estimate_tokens(response)
+
+
+async def answer_clues(llm, clues, semaphore, bucket=None, retries=3, backoff=1.0,
+                       completion_tokens=ANSWER_TOKENS):
+    """Asks ``llm`` several clues in one packed request; returns a report row per clue.
+
+    Clues the reply has no numbered answer for are asked again one at a time.
+    Token counts are split evenly over the clues of the request, and
+    ``tokens_saved`` is the single-clue prompt's size less that share.
+    """
+    prompt = pack(clues)
+    async with semaphore:
+        if bucket is not None:
+            await bucket.acquire(estimate_tokens(prompt) + completion_tokens * len(clues))
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            try:
+                response, prompt_tokens, reply_tokens = await _call_llm(llm, prompt)
+                error = None
+                break
+            except Exception as exc:
+                response, prompt_tokens, reply_tokens, error = "", 0, 0, repr(exc)
+                if attempt < retries:
+                    await asyncio.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+        latency = time.perf_counter() - start
+
+    rows = []
+    answers = unpack(response, len(clues)) if error is None else [""] * len(clues)
+    if error is None:
+        scores, correct = grade_batch(answers, [clue["response"] for clue in clues], [clue["clue"] for clue in clues])
+    else:
+        scores, correct = [0.0] * len(clues), [False] * len(clues)
+    for clue, answer, score, right in zip(clues, answers, scores, correct):
+        if error is None and not answer and len(clues) > 1:
+            rows.extend(await answer_clues(llm, [clue], semaphore, bucket, retries, backoff))
+            continue
+        single = estimate_tokens(render("answer", category=clue["category"], clue=clue["clue"]))
+        rows.append({
+            "id": clue["id"],
+            "category": clue["category"],
+            "difficulty": clue.get("difficulty"),
+            "clue": clue["clue"],
+            "answer": clue["response"],
+            "response": answer.strip(),
+            "score": float(score),
+            "correct": bool(right),
+            "latency": latency,
+            "attempts": attempt + 1,
+            "packed": len(clues),
+            "prompt_tokens": prompt_tokens / len(clues),
+            "completion_tokens": reply_tokens / len(clues),
+            "tokens_saved": single - prompt_tokens / len(clues) if len(clues) > 1 else 0,
+            "error": error,
+        })
+    return rows
+
+
+async def answer_clue(llm, clue, semaphore, bucket=None, retries=3, backoff=1.0,
+                      completion_tokens=ANSWER_TOKENS):
+    """Asks ``llm`` one clue; returns a report row."""
+    rows = await answer_clues(llm, [clue], semaphore, bucket, retries, backoff, completion_tokens)
+    return rows[0]
+
+
+async def run_batch(llm, clues, out_path, concurrency=8, tokens_per_minute=None, retries=3,
+                    pack_size=1, budget=1000):
+    """Answers ``clues`` concurrently, appending each result to ``out_path``.
+
+    With ``pack_size`` above 1, up to that many clues share a request of at
+    most ``budget`` tokens.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+    tasks = [asyncio.create_task(answer_clues(llm, batch, semaphore, bucket, retries))
+             for batch in batches(clues, pack_size, budget)]
+    results = []
+    start = time.perf_counter()
+    with open(out_path, "a", encoding="utf-8") as out:
+        for task in asyncio.as_completed(tasks):
+            for row in await task:
+                out.write(json.dumps(row) + "\n")
+                results.append(row)
+            out.flush()
+    return results, time.perf_counter() - start
+
+
+async def run_scheduled(llm, source, n, scheduler, subject, out_path, concurrency=8,
+                        tokens_per_minute=None, retries=3):
+    """Answers ``n`` clues chosen one at a time by ``scheduler``.
+
+    ``concurrency`` workers each pick a clue, answer it and report the grade
+    back before picking the next, so later picks see earlier results.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+    results = []
+    remaining = [n]
+    start = time.perf_counter()
+
+    async def worker(out):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            clue = scheduler.next_clue(subject, source)
+            if clue is None:
+                return
+            row = await answer_clue(llm, clue, semaphore, bucket, retries)
+            scheduler.record_clue(subject, clue, row["correct"])
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+            results.append(row)
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        await asyncio.gather(*(worker(out) for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    latencies = sorted(r["latency"] for r in results)
+    n = len(results)
+    if not n:
+        return {"clues": 0}
+    return {
+        "clues": n,
+        "correct": sum(r["correct"] for r in results),
+        "accuracy": sum(r["correct"] for r in results) / n,
+        "errors": sum(r["error"] is not None for r in results),
+        "elapsed": elapsed,
+        "clues_per_sec": n / elapsed if elapsed else float("inf"),
+        "p50_latency": latencies[n // 2],
+        "p95_latency": latencies[min(n - 1, int(n * 0.95))],
+        "prompt_tokens_per_clue": sum(r["prompt_tokens"] for r in results) / n,
+        "tokens_saved_per_clue": sum(r["tokens_saved"] for r in results) / n,
+    }
+
+
+def load_source(dump=None):
+    if dump and dump.endswith(".jca"):
+        from clue_archive import ClueArchive
+        return ClueArchive(dump)
+    return LocalClueStore.load(dump) if dump else get_clue_source()
+
+
+def load_clues(n, dump=None):
+    """``n`` distinct random clues; raises ValueError if the source has fewer."""
+    source = load_source(dump)
+    clues = {}
+    while len(clues) < n:
+        # The upstream may cap a request or repeat clues; ask again for the rest
+        fresh = [clue for clue in source.random_clues(n - len(clues)) if clue["id"] not in clues]
+        if not fresh:
+            raise ValueError(f"the clue source has only {len(clues)} distinct clues, {n} requested")
+        clues.update((clue["id"], clue) for clue in fresh)
+    return list(clues.values())[:n]
+
+
+def make_llm(model, clues, temperature=0):
+    if model == "stub":
+        from stub_llm import StubLLM
+        return StubLLM({c["clue"]: c["response"] for c in clues})
+    from langchain.llms import OpenAI
+    return OpenAI(model_name=model, temperature=temperature)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--num-clues", type=int, default=100)
+    parser.add_argument("--dump", help="CSV/JSONL clue dump (default: JEOPARDY_CLUE_DUMP or cluebase)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="OpenAI model name, or 'stub'")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tpm", type=int, default=None, help="token-per-minute limit")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--out", default="batch_report.jsonl")
+    parser.add_argument("--schedule", choices=("explore", "target"),
+                        help="pick clues adaptively instead of uniformly at random")
+    parser.add_argument("--pack", type=int, default=1, help="clues per request (packed prompt)")
+    parser.add_argument("--budget", type=int, default=1000, help="token budget of a packed request")
+    args = parser.parse_args(argv)
+
+    if args.schedule:
+        from scheduler import Scheduler
+        source = load_source(args.dump)
+        scheduler = Scheduler.from_store(source, policy=args.schedule)
+        if not len(scheduler):
+            parser.error("--schedule needs a clue dump (--dump or JEOPARDY_CLUE_DUMP)")
+        llm = make_llm(args.model, source)
+        results, elapsed = asyncio.run(
+            run_scheduled(llm, source, args.num_clues, scheduler, f"model:{args.model}",
+                          args.out, args.concurrency, args.tpm, args.retries))
+    else:
+        try:
+            clues = load_clues(args.num_clues, args.dump)
+        except ValueError as exc:
+            parser.error(str(exc))
+        llm = make_llm(args.model, clues)
+        results, elapsed = asyncio.run(
+            run_batch(llm, clues, args.out, args.concurrency, args.tpm, args.retries,
+                      args.pack, args.budget))
+    print(json.dumps(summarize(results, elapsed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Fan one clue out to several models or agent setups at once.
+
+A setup is a model name (``gpt-3.5-turbo``), ``agent:<model>`` for the ReAct
+agent with search tools on that model, or ``stub[:accuracy[:latency]]`` for an
+offline stand-in (see registry.py).  Every setup runs on its own thread, so a
+comparison takes as long as the slowest setup rather than the sum of all of
+them.  Answers are graded with the game's grader.
+
+    python model_compare.py --models stub:0.9:0.3,stub:0.5:1.0 -n 5
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from game_engine import grade_response
+from prompts import estimate_tokens, render
+from registry import DEFAULT_MODEL, get_agent, get_llm
+from response_cache import cached_llm_call
+
+# Comma-separated setups offered by the ChatGPT vs Archive comparison mode
+COMPARE_MODELS_ENV = "JEOPARDY_COMPARE_MODELS"
+DEFAULT_SETUPS = (DEFAULT_MODEL, "gpt-4", f"agent:{DEFAULT_MODEL}")
+
+
+def configured_setups():
+    value = os.environ.get(COMPARE_MODELS_ENV)
+    if not value:
+        return list(DEFAULT_SETUPS)
+    return [s.strip() for s in value.split(",") if s.strip()]
+
+
+def _model(setup):
+    return setup[len("agent:"):] if setup.startswith("agent:") else setup
+
+
+def teach_stubs(setups, clue, answer):
+    """Gives the stub setups the archive answer, so offline runs are gradeable."""
+    for setup in setups:
+        if _model(setup).startswith("stub"):
+            get_llm(_model(setup)).learn(clue, answer)
+
+
+def _ask(setup, prompt, tools):
+    """Returns (response, prompt_tokens + completion_tokens, cost in USD)."""
+    is_agent = setup.startswith("agent:")
+    model = _model(setup)
+    llm = get_llm(model)
+    if model.startswith("stub"):
+        # Stubs have no tools; "agent:stub" is the same stand-in
+        response = cached_llm_call(llm, prompt)
+        return response, estimate_tokens(prompt) + estimate_tokens(response), 0.0
+
+    # A handler per call: get_openai_callback() is process-wide and would mix
+    # up the usage of setups running side by side
+    from langchain.callbacks.openai_info import OpenAICallbackHandler
+    usage = OpenAICallbackHandler()
+    if is_agent:
+        # Not cached: tool results change over time, and the plain model's
+        # cache entry for the same prompt must not answer for the agent
+        response = get_agent(tools, model).run(prompt, callbacks=[usage])
+    else:
+        response = cached_llm_call(
+            llm, prompt, lambda: llm.generate([prompt], callbacks=[usage]).generations[0][0].text)
+    return response, usage.total_tokens, usage.total_cost
+
+
+def _run_setup(setup, category, clue, answer, tools):
+    prompt = render("agent_answer" if setup.startswith("agent:") else "answer", category=category, clue=clue)
+    start = time.perf_counter()
+    try:
+        response, tokens, cost = _ask(setup, prompt, tools)
+        error = None
+    except Exception as exc:
+        response, tokens, cost, error = "", 0, 0.0, repr(exc)
+    return {
+        "model": setup,
+        "response": response.strip(),
+        "correct": error is None and grade_response(response, answer, clue),
+        "latency": time.perf_counter() - start,
+        "tokens": tokens,
+        "cost": cost,
+        "error": error,
+    }
+
+
+def compare(setups, category, clue, answer, tools=("serpapi",)):
+    """Asks every setup the clue concurrently; one result row per setup, in order."""
+    if not setups:
+        return []
+    with ThreadPoolExecutor(len(setups), thread_name_prefix="compare") as pool:
+        futures = [pool.submit(_run_setup, setup, category, clue, answer, tuple(tools))
+                   for setup in setups]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", default=",".join(configured_setups()),
+                        help="comma-separated setups (model, agent:<model>, stub[:acc[:latency]])")
+    parser.add_argument("-n", "--num-clues", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    from simulator import synthetic_store
+    setups = [s.strip() for s in args.models.split(",") if s.strip()]
+    for clue in synthetic_store(args.num_clues):
+        teach_stubs(setups, clue["clue"], clue["response"])
+        start = time.perf_counter()
+        rows = compare(setups, clue["category"], clue["clue"], clue["response"])
+        print(f"{clue['clue'][:60]!r}: {time.perf_counter() - start:.2f}s wall")
+        for row in rows:
+            print(f"  {row['model']:>20}  {'correct' if row['correct'] else 'wrong':7}  "
+                  f"{row['latency']:6.2f}s  {row['tokens']:5d} tokens  ${row['cost']:.4f}  "
+                  f"{(row['error'] or row['response'])[:40]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Answer normalization used before grading.
+
+All patterns are compiled once, and results are memoized per raw string, so
+archive answers (which repeat heavily) are only normalized once per process.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+_PARENTHETICAL = re.compile(r"\([^()]*\)")
+_APOSTROPHE = re.compile(r"['‘’`]")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+_ARTICLE = re.compile(r"^(?:the|a|an) ")
+
+
+def fold(text):
+    """Strips accents and applies Unicode case folding.
+    >>> fold('Beyoncé Straße')
+    'beyonce strasse'
+    """
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.casefold()
+
+
+@lru_cache(maxsize=65536)
+def normalize_answer(text):
+    """Normalizes a response or archive answer for comparison.
+    >>> normalize_answer('The Beatles')
+    'beatles'
+    >>> normalize_answer("(Lake) Titicaca")
+    'titicaca'
+    >>> normalize_answer("an   Apple-a-day!")
+    'apple a day'
+    >>> normalize_answer("Ol' Blue Eyes")
+    'ol blue eyes'
+    >>> normalize_answer('Pokémon')
+    'pokemon'
+    """
+    text = _PARENTHETICAL.sub("", text)
+    text = fold(text)
+    text = _APOSTROPHE.sub("", text)
+    text = _PUNCTUATION.sub(" ", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _ARTICLE.sub("", text)
@@ -1,27 +1,24 @@
-import re
 import os
 import sys
 
 sys.path.append(os.path.abspath('..'))
 from utils import *
+from game_engine import grade_response, is_game_over, record_answer, reset_score, score_line
 
 import streamlit as st
-import requests
-import json
+import threading
+from types import SimpleNamespace
 from footer import footer
-
-from langchain.llms import OpenAI
-from langchain.chat_models import ChatOpenAI
-from langchain.agents import load_tools, initialize_agent
-from langchain.chains.conversation.memory import ConversationBufferMemory
-from langchain.callbacks import StreamlitCallbackHandler
-from langchain.callbacks import get_openai_callback
-
-llm = OpenAI(model_name="gpt-3.5-turbo", temperature=0)
-tools = load_tools(["serpapi"], llm=llm) 
-
-# Finally, let's initialize an agent with the tools, the language model, and the type of agent we want to use.
-agent = initialize_agent(tools, llm, agent="zero-shot-react-description", verbose=True)
+from leaderboard import get_leaderboard, new_game_id
+from model_compare import compare, configured_setups, teach_stubs
+from instrumentation import start_exporters, timer
+from prompts import render
+from registry import get_agent, get_llm
+from response_cache import agent_namespace, cached_llm_call, get_response_cache
+from tasks import PENDING, Progress, collect, discard, get_task, rerun_while_pending, submit
+
+# The LLM and agent are built on first use and shared across sessions (see registry.py)
+TOOLS = ("serpapi",)
 callback_properties = [
         "total_tokens",
         "prompt_tokens",
@@ -38,24 +35,35 @@ def init(totq: int = 3,
         st.session_state.start = 0  
         # Distinguish between a brand new session and restart
         st.session_state.input = 0
-        # Track number of points scored in a game
-        st.session_state.points = 0
-        # Track total number of questions received in a game
-        st.session_state.nq = 0
-        # Track number of questions answered correctly in a game
-        st.session_state.answered = 0
+        # Track points, questions received and questions answered correctly in a game
+        reset_score(st.session_state)
         # Track question theme
         st.session_state.theme = theme
         # Track chatgpt explanation
         st.session_state.explain = explain
+        # Groups this game's events in the leaderboard history
+        st.session_state.game_id = new_game_id()
 
+    if 'clues' not in st.session_state:
+        # The archive clue queue, owned by the fetch task; a replaced fetch
+        # may still be running, so fetches take turns
+        st.session_state.clues = SimpleNamespace(lock=threading.Lock())
     st.session_state.start = 0
-    question = generate_question_from_archive(None, None)
-    print(question)
-    st.session_state.question = question
+    # A call still running for the old clue must not be graded against the new one
+    discard(st.session_state, "answer", "compare")
+    # Fetched in the background; main() shows it once it arrives
+    st.session_state.pop('question', None)
+    submit(st.session_state, "question", (st.session_state.game_id, st.session_state.nq),
+           fetch_question, st.session_state.clues, totq)
     st.session_state.totq = totq
 
 
+def fetch_question(clues, totq):
+    """Pops the next archive question; runs as a background task."""
+    with clues.lock:
+        return next_question_from_archive(clues, totq)
+
+
 def restart():
     init(st.session_state.totq,
          st.session_state.theme,
@@ -64,25 +72,100 @@ def restart():
     st.session_state.input += 1
 
 
+def ask_chatgpt(category, question, explain, progress):
+    """Gets ChatGPT's response to the clue, streaming it into ``progress``.
+
+    Runs as a background task; returns the response and the usage to show.
+    The agent's reasoning streams into ``progress.reasoning`` and the answer
+    is handed to ``progress.finish`` as soon as its line is complete.
+    """
+    from streaming import ReasoningHandler, TokenStreamHandler, ToolTimingHandler, record_usage
+    from tool_cache import get_tool_cache
+
+    if explain == 0:
+        stream = TokenStreamHandler(progress, on_final_answer=progress.finish)
+        guess = get_jeopardy_response_from_llm_no_chain(category, question, callbacks=[stream])
+        stream.finish(guess)
+        return guess, stream.usage()
+
+    from langchain.callbacks import get_openai_callback
+    llm = get_llm(streaming=True)
+    agent = get_agent(TOOLS, streaming=True)
+    with get_openai_callback() as cb:
+        prompt = render("agent_answer", category=category, clue=question)
+        stream = TokenStreamHandler(progress, agent=True, on_final_answer=progress.finish)
+        reasoning = ReasoningHandler(progress.write_reasoning)
+        steps = ToolTimingHandler()
+        guess = cached_llm_call(llm, prompt, lambda: agent.run(prompt, callbacks=[stream, reasoning, steps]),
+                                namespace=agent_namespace(TOOLS))
+        stream.finish(guess)
+        cb_dict = {}
+        for prop in callback_properties:
+            prop_value = getattr(cb, prop, 0)
+            cb_dict[prop] = prop_value
+        cb_dict.update(stream.usage())
+        cb_dict.update(get_response_cache().stats())
+        cb_dict.update(get_tool_cache().stats())
+        cb_dict["steps"] = steps.steps
+        record_usage(cb, llm.model_name)
+    return guess, cb_dict
+
+
+def compare_models(category, question, answer, value, rows):
+    """Shows every selected setup's result for the clue side by side."""
+    st.write(f"**Answer:** {answer}")
+    st.table([{"model": r["model"], "response": r["error"] or r["response"],
+               "correct": "✅" if r["correct"] else "❌", "latency (s)": round(r["latency"], 2),
+               "tokens": r["tokens"], "cost ($)": round(r["cost"], 5)} for r in rows])
+    for row in rows:
+        if row["error"] is None:
+            get_leaderboard().record("chatgpt_vs_archive", "ChatGPT", category, row["correct"], value,
+                                     model=row["model"], game_id=st.session_state.game_id)
+
+
 def main():
     
     st.title("This is Jeopardy!")
     st.write("##### **Archive asks, ChatGPT responds**")
     st.write("")
 
-    if 'question' not in st.session_state:
+    if 'question' not in st.session_state and get_task(st.session_state, "question") is None:
         init()
 
     reset, points, questions, settings = st.columns([2, 2, 2, 6], gap="small")
     reset.button(f'Reset', on_click=init)
 
+    setups = configured_setups()
+
     with settings.expander('Settings'):
-        theme = st.selectbox("Theme", ("Before and After", "Events after Sep 2021", "Movie Mashups", "C"), key='theme')
+        st.selectbox("Theme", ("Before and After", "Events after Sep 2021", "Movie Mashups", "C"), key='theme')
         st.select_slider('Set lives', list(range(1, 6)), 3, key='heart', on_change=restart)
-        explain = st.radio("Show ChatGPT Reasoning", (0, 1), key='explain', horizontal=True)
+        st.radio("Show ChatGPT Reasoning", (0, 1), key='explain', horizontal=True)
+        st.checkbox("Compare models", key='compare')
+        if st.session_state.get('compare'):
+            st.multiselect("Models", setups, setups, key='compare_setups')
+        st.caption("Model accuracy")
+        st.table(get_leaderboard().top("model", n=5, by="accuracy"))
 
     header1, header2, header3, placeholder, response, debug, usage1, usage2 = st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty()
 
+    try:
+        fetched = collect(st.session_state, "question", timeout=0.1)
+        if fetched is not PENDING and fetched is not None and not fetched:
+            # Upstream is down and no clue has been remembered yet
+            raise LookupError("no clues are available right now")
+    except Exception as exc:
+        debug.error(f"Could not get a question: {exc}")
+        st.button('Try again', on_click=restart)
+        return
+    if fetched is not PENDING and fetched is not None:
+        st.session_state.question = fetched
+    if 'question' not in st.session_state:
+        header1.info("Fetching the next clue...")
+        questions.button(f'Q: {st.session_state.nq}')
+        points.button(f'Pts: {st.session_state.points}')
+        return
+
     category = st.session_state.question[0]
     question = st.session_state.question[1]
     answer = st.session_state.question[2]
@@ -92,47 +175,67 @@ def main():
     header2.write(f"**Clue:** {question}")
     header3.write(f"**Points:** {value}")
 
-    go = placeholder.button("Go ChatGPT!")
-
-    if go: 
-        if st.session_state.explain == 0:
-            guess = get_jeopardy_response_from_llm_no_chain(category, question)
-            response.write(f"ChatGPT response: {guess}")
-        else:
-            with get_openai_callback() as cb:
-                prompt = f"This is Jeopardy! The category is {category}. The clue is \"{question}\". You can perform any necessary calculations to get the answer. You should answer in as few words as possible. You will only provide the answer, you will not respond in the form of a question."
-           
-                st_callback = StreamlitCallbackHandler(st.container())
-                guess = agent.run(prompt, callbacks=[st_callback])
-                response.write(f"ChatGPT response: {guess}")
-                cb_dict = {}
-                for prop in callback_properties:
-                    prop_value = getattr(cb, prop, 0)
-                    cb_dict[prop] = prop_value                
-            
-        lguess = guess.lower()
-        sresponse = sanitize(lguess)
-        sanswer = sanitize(answer)
-        #sanswer = sanswer.split()[-1]
-
-        if (compare_strings(sresponse, sanswer) >= 0.5):
-            debug.success(f"**Correct**, the answer was: {answer}! 🎈")
-            st.session_state.points += value
-            st.session_state.answered += 1
-        else:
-            debug.error(f"**Incorrect**, the answer was: {answer}! 😓")
-            st.session_state.points -= value
-
-        if st.session_state.explain != 0:
-            usage1.markdown(f"**Usage:**")
-            usage2.write(cb_dict)
-        st.session_state.nq += 1
-
-        if st.session_state.nq < st.session_state.totq:
-            st.button('Next', on_click=restart)
-     
-    if st.session_state.nq == st.session_state.totq:
-        score = f"{st.session_state.points} ({st.session_state.answered}/{st.session_state.nq})"
+    # Repeated clicks while a call is running join it (same game, question and clue)
+    key = (st.session_state.game_id, st.session_state.nq, category, question)
+    if st.session_state.get('compare'):
+        setups = st.session_state.compare_setups
+        if placeholder.button("Compare models!"):
+            teach_stubs(setups, question, answer)
+            submit(st.session_state, "compare", key, compare, setups, category, question, answer, TOOLS)
+        task = get_task(st.session_state, "compare")
+        if task is not None and task.key == key:
+            rows = collect(st.session_state, "compare", timeout=0.1)
+            if rows is PENDING:
+                response.info(f"Asking {len(setups)} models... ({task.elapsed():.0f}s)")
+            else:
+                compare_models(category, question, answer, value, rows)
+                st.button('Next', on_click=restart)
+    else:
+        if placeholder.button("Go ChatGPT!"):
+            progress = Progress()
+            submit(st.session_state, "answer", key, ask_chatgpt, category, question,
+                   st.session_state.explain, progress, progress=progress)
+        task = get_task(st.session_state, "answer")
+        if task is not None and task.key == key:
+            try:
+                result = collect(st.session_state, "answer", timeout=0.1)
+            except Exception as exc:
+                debug.error(f"ChatGPT could not answer: {exc}")
+                st.button('Next', on_click=restart)
+                result = None
+
+            def show_grade(guess):
+                correct = grade_response(guess, answer, question)
+                if correct:
+                    debug.success(f"**Correct**, the answer was: {answer}! 🎈")
+                else:
+                    debug.error(f"**Incorrect**, the answer was: {answer}! 😓")
+                return correct
+
+            # Whatever the call has streamed so far
+            if task.progress.reasoning:
+                st.expander("ChatGPT reasoning", expanded=True).text(task.progress.reasoning)
+            if result is PENDING:
+                response.write(task.progress.text or f"Asking ChatGPT... ({task.elapsed():.0f}s)")
+                if task.progress.answer is not None:
+                    # The answer line is in; grade it while the run winds down
+                    show_grade(task.progress.answer)
+            elif result is not None:
+                guess, cb_dict = result
+                response.write(task.progress.text)
+                correct = show_grade(guess)
+
+                usage1.markdown(f"**Usage:**")
+                usage2.write(cb_dict)
+                record_answer(st.session_state, correct, value)
+                get_leaderboard().record("chatgpt_vs_archive", "ChatGPT", category, correct, value,
+                                         model=get_llm().model_name, game_id=st.session_state.game_id)
+
+                if not is_game_over(st.session_state):
+                    st.button('Next', on_click=restart)
+
+    if is_game_over(st.session_state):
+        score = score_line(st.session_state)
         debug.error(f"**Incorrect**, the answer was: {answer}! **Sorry, Game Over** Your score: {score} 😓")
         st.button('Play again?', on_click=init)
     
@@ -141,5 +244,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
-    footer()
\ No newline at end of file
+    start_exporters()
+    with timer("render", page="chatgpt_vs_archive"):
+        main()
+    footer()
+    rerun_while_pending(st.session_state)
\ No newline at end of file
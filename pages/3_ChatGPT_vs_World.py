@@ -1,27 +1,19 @@
-import pandas as pd
-import re
-import time
 import os
 
 import streamlit as st
-import requests
-import json
 from footer import footer
+from instrumentation import start_exporters, timer
+from prompts import render
+from registry import get_agent, get_llm
+from response_cache import agent_namespace, cached_llm_call, get_response_cache
 from utils import *
-
-from langchain.llms import OpenAI
-from langchain.chat_models import ChatOpenAI
-from langchain.agents import load_tools, initialize_agent
-from langchain.chains.conversation.memory import ConversationBufferMemory
-from langchain.callbacks import StreamlitCallbackHandler
-from langchain.callbacks import get_openai_callback
+from game_engine import grade_response
+from search_index import get_search_index
+from tasks import PENDING, Progress, collect, get_task, get_task_runner, rerun_while_pending, submit
 
 os.environ["WOLFRAM_ALPHA_APPID"] = "ULLYPR-PVA7XY3Y89"
-llm = OpenAI(model_name="gpt-3.5-turbo", temperature=0, streaming=True)
-tools = load_tools(["serpapi", "wolfram-alpha"], llm=llm) 
-
-# Finally, let's initialize an agent with the tools, the language model, and the type of agent we want to use.
-agent = initialize_agent(tools, llm, agent="zero-shot-react-description", verbose=True)
+# The LLM and agent are built on first use and shared across sessions (see registry.py)
+TOOLS = ("serpapi", "wolfram-alpha")
 callback_properties = [
         "total_tokens",
         "prompt_tokens",
@@ -52,7 +44,9 @@ def init(heart: int = 3,
         st.session_state.theme = theme
 
     st.session_state.start = 0
-    st.session_state.question = generate_question_from_archive(None, None)
+    # Fetched in the background
+    st.session_state.pop('question', None)
+    submit(st.session_state, "question", st.session_state.input, generate_question_from_archive, None, None)
     st.session_state.lives = heart
 
 
@@ -67,37 +61,105 @@ def restart():
     st.session_state.lives = 3
 
 
+def ask_chatgpt(category, question, progress):
+    """Gets the agent's answer to the typed clue, streaming it into ``progress``.
+
+    Runs as a background task; returns the answer and the usage to show.
+    The agent's reasoning streams into ``progress.reasoning``.
+    """
+    from langchain.callbacks import get_openai_callback
+    from streaming import ReasoningHandler, TokenStreamHandler, ToolTimingHandler, record_usage
+    from tool_cache import get_tool_cache
+    llm = get_llm(streaming=True)
+    agent = get_agent(TOOLS, streaming=True)
+    with get_openai_callback() as cb:
+        prompt = render("agent_answer", category=category, clue=question)
+        stream = TokenStreamHandler(progress, prefix="", agent=True)
+        reasoning = ReasoningHandler(progress.write_reasoning)
+        steps = ToolTimingHandler()
+        answer = cached_llm_call(llm, prompt, lambda: agent.run(prompt, callbacks=[stream, reasoning, steps]),
+                                 namespace=agent_namespace(TOOLS))
+        stream.finish(answer)
+        cb_dict = {}
+        for prop in callback_properties:
+            value = getattr(cb, prop, 0)
+            cb_dict[prop] = value
+        cb_dict.update(stream.usage())
+        cb_dict.update(get_response_cache().stats())
+        cb_dict.update(get_tool_cache().stats())
+        cb_dict["steps"] = steps.steps
+        record_usage(cb, llm.model_name)
+    return answer, cb_dict
+
+
 def main():
     
     st.title("This is Jeopardy!")
     st.write("##### **Contestant asks, ChatGPT responds**")
     st.write("")
 
-    if 'question' not in st.session_state:
+    if 'question' not in st.session_state and get_task(st.session_state, "question") is None:
         init()
+    try:
+        fetched = collect(st.session_state, "question")
+    except Exception:
+        # Only kept for the session; the page works without it
+        fetched = None
+    if fetched is not PENDING and fetched is not None:
+        st.session_state.question = fetched
 
-    p1, p2, p3, b1, b2, response, debug = st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty()
+    p1, hint, p2, found, p3, b1, b2, response, debug = st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty(), st.empty()
 
     category = p1.text_input("**Category:**")
     question = p2.text_input("**Clue:**")
-    value = p3.text_input("**Points:**", 1000)
+    # Built in the background once something is typed; completions and
+    # grading start when it is ready
+    index = get_task_runner().shared("search_index", get_search_index, max_age=60) if category or question else None
+    completions = index.complete_category(category, limit=8) if category and index else []
+    if completions and category.strip().lower() not in (c.lower() for c in completions):
+        hint.caption("Archive categories: " + " · ".join(completions))
+    elif (category or question) and index is None:
+        hint.caption("Indexing archive clues...")
+    # A typed clue that is (nearly) an archive clue has a known answer to grade against
+    archive = index.match(question) if question and index else None
+    if archive is not None:
+        found.caption(f"Found in the archive ({archive['category']}); ChatGPT's answer will be graded.")
+    p3.text_input("**Points:**", 1000)
     b1.write("")
     go = b2.button("Go ChatGPT!")
 
-    if go: 
-        with get_openai_callback() as cb:
-            prompt = f"This is Jeopardy! The category is {category}. The clue is \"{question}\". You can perform any necessary calculations to get the answer. You should answer in as few words as possible. You will only provide the answer, you will not respond in the form of a question"
-            st_callback = StreamlitCallbackHandler(st.container())
-            response = agent.run(prompt, callbacks=[st_callback])
-            st.write(response)
+    # Repeated clicks for the same clue join the call already running
+    key = (category, question)
+    if go:
+        progress = Progress()
+        submit(st.session_state, "answer", key, ask_chatgpt, category, question, progress, progress=progress)
+    task = get_task(st.session_state, "answer")
+    if task is not None and task.key == key:
+        try:
+            result = collect(st.session_state, "answer", timeout=0.1)
+        except Exception as exc:
+            debug.error(f"ChatGPT could not answer: {exc}")
+            result = None
+        # Whatever the agent has streamed so far
+        if task.progress.reasoning:
+            st.expander("Reasoning", expanded=True).text(task.progress.reasoning)
+        if result is PENDING:
+            response.write(task.progress.text or f"Asking ChatGPT... ({task.elapsed():.0f}s)")
+        elif result is not None:
+            answer, cb_dict = result
+            response.write(task.progress.text)
+            if archive is not None:
+                if grade_response(answer, archive["response"], archive["clue"]):
+                    debug.success(f"**Correct**, the archive answer is: {archive['response']}! 🎈")
+                else:
+                    debug.error(f"**Incorrect**, the archive answer is: {archive['response']}! 😓")
             st.markdown(f"**Usage:**")
-            cb_dict = {}
-            for prop in callback_properties:
-                value = getattr(cb, prop, 0)
-                cb_dict[prop] = value
             st.write(cb_dict)
-            
+
 
 if __name__ == "__main__":
-    main()
-    footer()
\ No newline at end of file
+    start_exporters()
+    with timer("render", page="chatgpt_vs_world"):
+        main()
+    footer()
+    rerun_while_pending(st.session_state)
\ No newline at end of file
@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import inc
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchBuffer(object):
+    """Bounded per-key queues that a background thread pool keeps topped up.
+
+    ``producer(key)`` is called off the caller's thread and returns an
+    iterable of items for that key.  ``get(key)`` pops a ready item without
+    blocking on the producer unless ``timeout`` is given and the queue is
+    empty.  When ``validate`` is given, each produced item is passed through
+    it and dropped if it returns None (or raises).
+    """
+
+    def __init__(self, producer, depth=8, low_water=2, workers=2, validate=None,
+                 concurrency=1):
+        self.producer = producer
+        self.depth = depth
+        self.low_water = low_water
+        self.validate = validate
+        # Refills allowed in flight at once for a single key
+        self.concurrency = concurrency
+        self._queues = {}
+        self._inflight = {}
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="prefetch")
+        self.produced = 0
+        self.discarded = 0
+        self.failures = 0
+        self.refills = 0
+        self.refill_seconds = 0.0
+        self.last_refill_seconds = None
+
+    def get(self, key, timeout=None):
+        """Pops the next item for ``key``, or returns None if none is ready."""
+        with self._cond:
+            queue = self._queues.setdefault(key, deque())
+            if not queue and timeout:
+                self._schedule(key)
+                self._cond.wait_for(lambda: queue or not self._inflight.get(key), timeout)
+            item = queue.popleft() if queue else None
+            self._schedule(key)
+            return item
+
+    def prime(self, key):
+        """Starts filling the queue for ``key`` ahead of the first ``get``."""
+        with self._cond:
+            self._queues.setdefault(key, deque())
+            self._schedule(key)
+
+    def stats(self):
+        """Buffer depth per key, refills in flight and producer latency."""
+        with self._cond:
+            return {
+                "depth": {str(k): len(q) for k, q in self._queues.items()},
+                "refills_in_flight": sum(self._inflight.values()),
+                "produced": self.produced,
+                "discarded": self.discarded,
+                "failures": self.failures,
+                "mean_refill_seconds": self.refill_seconds / self.refills if self.refills else None,
+                "last_refill_seconds": self.last_refill_seconds,
+            }
+
+    def _schedule(self, key, top_up=False):
+        # Caller holds self._cond
+        queue = self._queues[key]
+        inflight = self._inflight.get(key, 0)
+        # Only start refilling once we are down to the low-water mark, then top
+        # up with enough concurrent refills to cover the gap without overshooting.
+        if not top_up and inflight == 0 and len(queue) > self.low_water:
+            return
+        while inflight < self.concurrency and len(queue) + inflight < self.depth:
+            inflight += 1
+            self._executor.submit(self._refill, key)
+        self._inflight[key] = inflight
+
+    def _refill(self, key):
+        start = time.perf_counter()
+        failed = False
+        try:
+            items = list(self.producer(key) or [])
+        except Exception as exc:
+            logger.warning("Prefetch failed for %s: %s", key, exc)
+            inc("prefetch_failures")
+            items, failed = [], True
+        accepted = []
+        for item in items:
+            if self.validate is not None:
+                try:
+                    item = self.validate(item)
+                except Exception:
+                    item = None
+            if item is not None:
+                accepted.append(item)
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            queue = self._queues[key]
+            for item in accepted:
+                if len(queue) >= self.depth:
+                    break
+                queue.append(item)
+            self.produced += len(accepted)
+            self.discarded += len(items) - len(accepted)
+            self.failures += failed
+            self.refills += 1
+            self.refill_seconds += elapsed
+            self.last_refill_seconds = elapsed
+            self._inflight[key] -= 1
+            self._cond.notify_all()
+            # Keep going until the queue is full, but stop on a batch with
+            # nothing usable so a failing upstream is not hammered in a loop.
+            if accepted:
+                self._schedule(key, top_up=True)
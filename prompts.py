@@ -0,0 +1,127 @@
+"""Prompt templates for answering and generating Jeopardy clues.
+
+Every prompt the app sends is rendered from ``TEMPLATES``, so the wording
+lives in one place (and cached responses stay keyed on the same text).
+
+The answer instructions are ~50 tokens against ~15 for a typical clue, so
+batch runs can ``pack`` several clues into one request: the instructions go
+out once, the model replies with one numbered line per clue, and ``unpack``
+splits the reply back up.  ``batches`` groups clues into packed requests that
+fit a token budget.
+"""
+import re
+
+_ANSWER_INSTRUCTIONS = ("You can perform any necessary calculations to get the answer. "
+                        "You should answer in as few words as possible. You will only provide "
+                        "the answer, you will not respond in the form of a question.")
+
+_GENERATE_RULES = ("Difficuly levels range from 1-5 with 1 being most easy and 5 being most difficult.\n"
+                   "Points are 200 times the difficulty level. \n"
+                   "Provide the question, category, points and correct answer in python dictionary format.\n")
+
+TEMPLATES = {
+    # One clue, answered by the plain model
+    "answer": "This is Jeopardy! The category is {category}. The clue is \"{clue}\". " + _ANSWER_INSTRUCTIONS,
+    # One clue, answered by an agent with tools
+    "agent_answer": ("This is Jeopardy! The category is {category}. The clue is \"{clue}\". "
+                     "You can perform any necessary calculations to get the answer. "
+                     "You should answer in as few words as possible. "
+                     "You will not respond in the form of a question!"),
+    # Several clues in one request; {clues} is one "packed_clue" line each
+    "packed_answer": ("This is Jeopardy! Answer each numbered clue below. " + _ANSWER_INSTRUCTIONS +
+                      " Reply with exactly one line per clue, in order, formatted as "
+                      "<number>. <answer>\n{clues}"),
+    "packed_clue": "{index}. The category is {category}. The clue is \"{clue}\".",
+    # One generated question (see generate_question_from_chatgpt)
+    "generate": ("This is Jeopardy!\n"
+                 "Generate a tough trivia question worth {points} points.\n"
+                 "You should know the answer to the question you are asking.\n"
+                 "Provide the question, category, points and correct answer in python dictionary format.\n"
+                 "Do not specify the correct answer in the form of a question!\n"),
+    "generate_at_difficulty": ("This is Jeopardy!\n"
+                               "Generate a question from a random category and difficulty level {difficulty}. \n"
+                               + _GENERATE_RULES),
+    "generate_in_category": ("This is Jeopardy!\n"
+                             "Generate a question from category {category} and a random difficulty level. \n"
+                             + _GENERATE_RULES),
+    "generate_in_category_at_difficulty": ("This is Jeopardy!\n"
+                                           "Generate a question from category {category} and difficulty "
+                                           "level {difficulty}. \n" + _GENERATE_RULES),
+    # k generated questions under a fixed JSON schema (see generate_questions_from_chatgpt)
+    "generate_batch": ("This is Jeopardy!\n"
+                       "Generate {k} different tough trivia questions {topic}, {level}.\n"
+                       "Difficulty levels range from 1-5 with 1 being most easy and 5 being most difficult.\n"
+                       "Points are 200 times the difficulty level.\n"
+                       "You should know the answer to every question you are asking.\n"
+                       "Do not specify the correct answer in the form of a question!\n"
+                       "Reply with only a JSON array of {k} objects, each with exactly these keys:\n"
+                       "{{\"category\": string, \"question\": string, \"answer\": string, \"points\": integer}}\n"),
+}
+
+# Expected completion length of one short answer, for budgeting
+ANSWER_TOKENS = 16
+
+_ANSWER_LINE = re.compile(r"^\s*(\d+)\s*[.):-]\s*(.*?)\s*$")
+
+
+def render(name, **fields):
+    """Fills in template ``name``.
+    >>> render("answer", category="RIVERS", clue="It flows through Cairo")[:60]
+    'This is Jeopardy! The category is RIVERS. The clue is "It fl'
+    """
+    return TEMPLATES[name].format(**fields)
+
+
+def estimate_tokens(text):
+    """Rough OpenAI token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def pack(clues):
+    """One prompt asking for every clue in ``clues``; a single clue gets the plain answer prompt."""
+    if len(clues) == 1:
+        return render("answer", category=clues[0]["category"], clue=clues[0]["clue"])
+    lines = [render("packed_clue", index=i, category=clue["category"], clue=clue["clue"])
+             for i, clue in enumerate(clues, 1)]
+    return render("packed_answer", clues="\n".join(lines))
+
+
+def unpack(response, n):
+    """Splits a packed reply into ``n`` answers, "" for any clue it skipped.
+    >>> unpack("1. The Nile\\n2) Abbey Road\\n", 3)
+    ['The Nile', 'Abbey Road', '']
+    >>> unpack("The Nile", 1)
+    ['The Nile']
+    """
+    if n == 1:
+        return [response.strip()]
+    answers = [""] * n
+    for line in response.splitlines():
+        match = _ANSWER_LINE.match(line)
+        if match and 1 <= int(match.group(1)) <= n and not answers[int(match.group(1)) - 1]:
+            answers[int(match.group(1)) - 1] = match.group(2)
+    return answers
+
+
+def batches(clues, max_clues=10, budget=1000, completion_tokens=ANSWER_TOKENS):
+    """Groups ``clues`` into lists whose packed prompt plus answers fit in ``budget`` tokens.
+
+    A clue too long to share a request is sent on its own.
+    >>> clues = [{"category": "RIVERS", "clue": "It flows through Cairo"}] * 5
+    >>> [len(b) for b in batches(clues, max_clues=2)]
+    [2, 2, 1]
+    >>> [len(b) for b in batches(clues, budget=200)]
+    [3, 2]
+    """
+    overhead = estimate_tokens(render("packed_answer", clues=""))
+    batch, used = [], overhead
+    for clue in clues:
+        cost = estimate_tokens(render("packed_clue", index=len(batch) + 1, category=clue["category"],
+                                      clue=clue["clue"])) + completion_tokens
+        if batch and (len(batch) >= max_clues or used + cost > budget):
+            yield batch
+            batch, used = [], overhead
+        batch.append(clue)
+        used += cost
+    if batch:
+        yield batch
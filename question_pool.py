@@ -0,0 +1,112 @@
+"""Background pre-generation of ChatGPT-sourced questions.
+
+Generating a question is a multi-second completion that frequently comes back
+malformed, so the Contestant page draws from a bounded per-(difficulty,
+category) buffer of already-validated questions that worker threads keep
+topped up.  Each refill asks for a batch of questions in one completion.
+Near-duplicates (see dedup_index.py) of archive clues are discarded as they
+arrive, and near-duplicates of questions already served in a game are skipped
+when drawn.
+"""
+import threading
+
+from dedup_index import get_archive_index
+from prefetch import PrefetchBuffer
+from utils import generate_questions_from_chatgpt
+
+
+def validate_question(question):
+    """Returns ``[category, clue, answer, points]`` cleaned up, or None if malformed.
+    >>> validate_question(['History', 'First US president', 'George Washington', '400'])
+    ['History', 'First US president', 'George Washington', 400]
+    >>> validate_question(['History', '', 'George Washington', 400]) is None
+    True
+    """
+    if not isinstance(question, (list, tuple)) or len(question) != 4:
+        return None
+    category, clue, answer, points = question
+    if not all(isinstance(s, str) and s.strip() for s in (category, clue, answer)):
+        return None
+    try:
+        points = int(str(points).strip().lstrip("$"))
+    except ValueError:
+        return None
+    if points <= 0:
+        return None
+    return [category.strip(), clue.strip(), answer.strip(), points]
+
+
+class QuestionPool(object):
+    """Keeps validated, pre-generated questions ready for each filter.
+
+    ``generate(k, difficulty, category)`` returns up to ``k`` raw questions.
+    ``archive()``, if given, returns the DedupIndex of archive clues; it is
+    called from the refill threads, so a slow first build stays off the page.
+    """
+
+    def __init__(self, generate=generate_questions_from_chatgpt, batch_size=5, depth=10,
+                 low_water=3, workers=4, concurrency=1, wait=60.0, archive=None):
+        self.generate = generate
+        self.batch_size = batch_size
+        self.wait = wait
+        self.archive = archive
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        self._buffer = PrefetchBuffer(lambda key: generate(batch_size, *key), depth, low_water,
+                                      workers, self._validate, concurrency)
+
+    def _validate(self, question):
+        question = validate_question(question)
+        if question is None:
+            return None
+        if self.archive is not None and self.archive().is_duplicate(question[1]):
+            self._duplicate()
+            return None
+        return question
+
+    def _duplicate(self):
+        with self._lock:
+            self.duplicates += 1
+
+    def prime(self, difficulty=None, category=None):
+        self._buffer.prime((difficulty, category))
+
+    def get(self, difficulty=None, category=None, seen=None):
+        """Returns a ready question, waiting on in-flight generation only if the buffer is empty.
+
+        Questions that near-duplicate a clue in ``seen`` (a DedupIndex) are
+        skipped, and the returned one is added to it.
+        """
+        key = (difficulty, category)
+        while True:
+            question = self._buffer.get(key) or self._buffer.get(key, timeout=self.wait)
+            if question is None:
+                # Every background attempt came back malformed; try once inline
+                candidates = map(self._validate, self.generate(self.batch_size, difficulty, category))
+                question = next((q for q in candidates if q is not None and
+                                 (seen is None or not seen.is_duplicate(q[1]))), None)
+            if question is None:
+                raise ValueError("ChatGPT did not return a usable question")
+            if seen is None or seen.add_if_new(question[1]):
+                return question
+            self._duplicate()
+
+    def stats(self):
+        """Buffer depth, refill concurrency and generation latency."""
+        stats = self._buffer.stats()
+        stats["duplicates"] = self.duplicates
+        return stats
+
+
+_question_pool = None
+_question_pool_lock = threading.Lock()
+
+
+def get_question_pool():
+    """Returns the process-wide question pool."""
+    global _question_pool
+    with _question_pool_lock:
+        if _question_pool is None:
+            _question_pool = QuestionPool(archive=get_archive_index)
+            _question_pool.prime()
+        return _question_pool
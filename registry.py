@@ -0,0 +1,57 @@
+"""Process-wide, lazily constructed LLMs and agents.
+
+Nothing from langchain is imported until a page actually asks for a model or
+an agent, and each distinct configuration is built once per process and then
+shared by every session and rerun.
+"""
+import os
+import threading
+from functools import lru_cache
+
+# Model used for answering and question generation unless a caller picks one
+DEFAULT_MODEL = os.environ.get("JEOPARDY_MODEL", "gpt-3.5-turbo")
+
+# Per-run agent budget: past either limit the agent stops calling tools and
+# gives its best answer from what it has gathered so far
+AGENT_MAX_STEPS = int(os.environ.get("JEOPARDY_AGENT_MAX_STEPS", "5"))
+AGENT_MAX_SECONDS = float(os.environ.get("JEOPARDY_AGENT_MAX_SECONDS", "30"))
+
+_lock = threading.RLock()
+
+
+@lru_cache(maxsize=None)
+def _build_llm(model_name, temperature, streaming):
+    if model_name.startswith("stub"):
+        # "stub[:accuracy[:latency]]", e.g. "stub:0.9:0.5"
+        from stub_llm import StubLLM
+        params = [float(p) for p in model_name.split(":")[1:3]]
+        return StubLLM(model_name=model_name, **dict(zip(("accuracy", "latency"), params)))
+    from langchain.llms import OpenAI
+    return OpenAI(model_name=model_name, temperature=temperature, streaming=streaming)
+
+
+@lru_cache(maxsize=None)
+def _build_agent(tool_names, model_name, temperature, streaming):
+    from langchain.agents import load_tools, initialize_agent
+    from tool_cache import cache_tools
+    llm = _build_llm(model_name, temperature, streaming)
+    tools = cache_tools(load_tools(list(tool_names), llm=llm))
+    return initialize_agent(tools, llm, agent="zero-shot-react-description", verbose=True,
+                            max_iterations=AGENT_MAX_STEPS, max_execution_time=AGENT_MAX_SECONDS,
+                            early_stopping_method="generate")
+
+
+def get_llm(model_name=DEFAULT_MODEL, temperature=0, streaming=False):
+    """Returns the shared LLM for this configuration, building it on first use."""
+    with _lock:
+        return _build_llm(model_name, temperature, streaming)
+
+
+def get_agent(tool_names=("serpapi",), model_name=DEFAULT_MODEL, temperature=0, streaming=False):
+    """Returns the shared zero-shot ReAct agent for these tools and model.
+
+    Tool calls are cached (see tool_cache.py) and each run is capped at
+    ``AGENT_MAX_STEPS`` tool steps and ``AGENT_MAX_SECONDS``.
+    """
+    with _lock:
+        return _build_agent(tuple(tool_names), model_name, temperature, streaming)
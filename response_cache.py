@@ -0,0 +1,192 @@
+"""Two-tier cache for LLM and agent responses.
+
+Entries are keyed on a hash of (model, temperature, prompt), plus a
+namespace for calls that answer the same prompt differently (an agent's tool
+set: a serpapi agent and a serpapi + wolfram-alpha one must not share
+answers).  An in-memory LRU
+answers repeats within a process; an optional SQLite tier (set
+``JEOPARDY_RESPONSE_CACHE`` to a file path) survives restarts and is shared by
+every worker pointing at the same file (with ``JEOPARDY_SHARED_CACHE`` set, the
+file defaults to one in the shared cache directory).  Both tiers expire entries
+after a TTL and evict least-recently-used entries beyond a size limit.
+
+Only deterministic (``temperature=0``) calls are cached by default; sampled
+completions such as generated questions are passed straight through unless
+``cache_nondeterministic`` is set.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import inc, timer
+
+RESPONSE_CACHE_ENV = "JEOPARDY_RESPONSE_CACHE"
+
+
+class LRUCache(object):
+    """Thread-safe in-memory LRU with per-entry TTL."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time() + self.ttl if self.ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class SQLiteCache(object):
+    """Disk tier: a single SQLite table in WAL mode, safe across processes."""
+
+    def __init__(self, path, max_entries=100000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                         "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                         "created REAL NOT NULL, accessed REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with conn:
+            if self.ttl and row[1] + self.ttl < now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, now, now))
+            if self.ttl:
+                conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                         "ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+
+class ResponseCache(object):
+    """Memory tier in front of an optional disk tier, with hit/miss counters."""
+
+    def __init__(self, memory=None, disk=None, cache_nondeterministic=False):
+        self.memory = memory if memory is not None else LRUCache()
+        self.disk = disk
+        self.cache_nondeterministic = cache_nondeterministic
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model, temperature, prompt, namespace=None):
+        raw = f"{model}\x1f{temperature}\x1f{prompt}"
+        if namespace:
+            raw += f"\x1f{namespace}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_or_call(self, model, temperature, prompt, fn, namespace=None):
+        """Returns the cached response for the prompt, calling ``fn()`` on a miss."""
+        if temperature and not self.cache_nondeterministic:
+            with self._lock:
+                self.bypassed += 1
+            with timer("llm_call", model=model):
+                return fn()
+        key = self.key(model, temperature, prompt, namespace)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            inc("llm_cache_hits", model=model)
+            return value
+        with self._lock:
+            self.misses += 1
+        with timer("llm_call", model=model):
+            value = fn()
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        return value
+
+    def stats(self):
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide response cache."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            from shared_cache import shared_cache_path
+            path = os.environ.get(RESPONSE_CACHE_ENV) or shared_cache_path("responses.sqlite")
+            _response_cache = ResponseCache(disk=SQLiteCache(path) if path else None)
+        return _response_cache
+
+
+def cached_llm_call(llm, prompt, fn=None, namespace=None):
+    """Calls ``llm(prompt)`` (or ``fn()``) through the response cache.
+
+    Give a ``namespace`` when ``fn`` answers differently from the plain model,
+    e.g. ``agent_namespace(tools)`` for an agent run.
+    """
+    return get_response_cache().get_or_call(
+        getattr(llm, "model_name", type(llm).__name__),
+        getattr(llm, "temperature", None),
+        prompt,
+        fn or (lambda: llm(prompt)),
+        namespace)
+
+
+def agent_namespace(tools):
+    """Cache namespace of an agent with ``tools``.
+    >>> agent_namespace(("wolfram-alpha", "serpapi"))
+    'agent:serpapi,wolfram-alpha'
+    """
+    return "agent:" + ",".join(sorted(tools))
@@ -0,0 +1,149 @@
+"""Adaptive clue selection from per-category, per-difficulty accuracy.
+
+Each subject ("contestant:Alex", "model:gpt-3.5-turbo") has a running
+correct/asked count for every (difficulty, category) cell of the clue store,
+kept in flat NumPy arrays.  To pick the next clue the scheduler draws a fixed
+number of candidate cells at random, scores them under the policy, and asks
+the store for a clue from the best one.  A selection therefore costs the same
+however many categories the corpus has.
+
+* ``target``: Thompson sampling towards a target accuracy (default 0.5).
+  Contestants get clues they have about an even chance on.
+* ``explore``: prefers the categories whose accuracy is least certain.  An
+  evaluation run then spends its LLM calls where they most narrow a model's
+  per-category estimates, instead of on categories that are already pinned
+  down.
+
+Unseen cells borrow the subject's accuracy at that difficulty as a weak prior,
+so the scheduler adapts after a handful of answers.
+"""
+import threading
+
+import numpy as np
+
+from clue_source import clue_difficulty, get_clue_source
+
+POLICIES = ("target", "explore")
+N_DIFFICULTY = 5
+
+
+class _Counts(object):
+    __slots__ = ("correct", "total", "by_difficulty", "by_category")
+
+    def __init__(self, n_cells, n_categories):
+        self.correct = np.zeros(n_cells, dtype=np.int32)
+        self.total = np.zeros(n_cells, dtype=np.int32)
+        # [difficulty - 1] -> (correct, total), the prior for unseen cells
+        self.by_difficulty = np.zeros((N_DIFFICULTY, 2), dtype=np.int64)
+        # [category id] -> (correct, total), what the explore policy narrows
+        self.by_category = np.zeros((n_categories, 2), dtype=np.int32)
+
+
+class Scheduler(object):
+    """Bandit-style picker over the (difficulty, category) cells of a store."""
+
+    def __init__(self, cells, policy="target", target=0.5, candidates=16,
+                 prior_strength=2.0, seed=None):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r}; expected one of {POLICIES}")
+        self.policy = policy
+        self.target = target
+        self.candidates = candidates
+        self.prior_strength = prior_strength
+        self.cells = [(int(d), c) for d, c in cells if d is not None and 1 <= int(d) <= N_DIFFICULTY]
+        self._cell_ids = {(d, c.strip().lower()): i for i, (d, c) in enumerate(self.cells)}
+        self._difficulty = np.array([d - 1 for d, _ in self.cells], dtype=np.int8)
+        category_ids = {}
+        self.categories = []
+        for _, c in self.cells:
+            if c.strip().lower() not in category_ids:
+                category_ids[c.strip().lower()] = len(self.categories)
+                self.categories.append(c)
+        self._category = np.array([category_ids[c.strip().lower()] for _, c in self.cells],
+                                  dtype=np.int32)
+        self._subjects = {}
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        return cls(store.cells(), **kwargs)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _counts(self, subject):
+        counts = self._subjects.get(subject)
+        if counts is None:
+            counts = self._subjects.setdefault(
+                subject, _Counts(len(self.cells), len(self.categories)))
+        return counts
+
+    def _posterior(self, counts, ids):
+        seen = counts.by_difficulty[self._difficulty[ids]]
+        prior = (seen[:, 0] + 1.0) / (seen[:, 1] + 2.0)
+        alpha = self.prior_strength * prior + counts.correct[ids]
+        beta = self.prior_strength * (1 - prior) + counts.total[ids] - counts.correct[ids]
+        return alpha, beta
+
+    def choose(self, subject):
+        """Returns the (difficulty, category) cell to ask ``subject`` next, or None."""
+        if not self.cells:
+            return None
+        with self._lock:
+            counts = self._counts(subject)
+            ids = self._rng.integers(0, len(self.cells), self.candidates)
+            if self.policy == "target":
+                alpha, beta = self._posterior(counts, ids)
+                score = -np.abs(self._rng.beta(alpha, beta) - self.target)
+            else:
+                # Posterior variance of the candidate's category accuracy
+                seen = counts.by_category[self._category[ids]]
+                alpha = seen[:, 0] + 1.0
+                n = seen[:, 1] + 2.0
+                score = alpha * (n - alpha) / (n * n * (n + 1))
+        return self.cells[ids[int(np.argmax(score))]]
+
+    def update(self, subject, difficulty, category, correct):
+        """Records one answer; clues outside the known cells only update the prior."""
+        difficulty = int(difficulty) if difficulty is not None else None
+        if difficulty is None or not 1 <= difficulty <= N_DIFFICULTY:
+            return
+        cell = self._cell_ids.get((difficulty, (category or "").strip().lower()))
+        with self._lock:
+            counts = self._counts(subject)
+            counts.by_difficulty[difficulty - 1] += (int(bool(correct)), 1)
+            if cell is not None:
+                counts.correct[cell] += bool(correct)
+                counts.total[cell] += 1
+                counts.by_category[self._category[cell]] += (int(bool(correct)), 1)
+
+    def next_clue(self, subject, source=None):
+        """A clue from the cell chosen for ``subject``, or None."""
+        source = source or get_clue_source()
+        cell = self.choose(subject)
+        return source.random_clue(*cell) if cell is not None else None
+
+    def record_clue(self, subject, clue, correct):
+        difficulty = clue.get("difficulty") or clue_difficulty(clue.get("value"))
+        self.update(subject, difficulty, clue["category"], correct)
+
+    def accuracy(self, subject, min_answers=1):
+        """``{category: (correct, asked)}`` for categories asked at least ``min_answers`` times."""
+        with self._lock:
+            seen = self._counts(subject).by_category.tolist()
+        return {self.categories[i]: (c, t) for i, (c, t) in enumerate(seen)
+                if t >= max(min_answers, 1)}
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(policy="target"):
+    """Returns the process-wide scheduler for ``policy`` over the current clue source."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(policy)
+        if scheduler is None:
+            scheduler = _schedulers[policy] = Scheduler.from_store(get_clue_source(), policy=policy)
+    return scheduler
@@ -0,0 +1,165 @@
+"""Fuzzy clue search and category completion over the clue corpus.
+
+Clues are indexed by their StrikeAMatch character pairs (see strikeamatch.py):
+one posting list of clue ids per pair.  A query's similarity to every clue is
+the Dice coefficient over pair sets, counted from the postings of the query's
+pairs alone, so finding the archive entry behind a typed clue (or a
+near-duplicate of it) takes milliseconds even for a full J! Archive dump.
+
+Category names get a sorted table of every word-start suffix ("world
+history", "history"), so completion is a binary search for the typed prefix.
+
+Over a memory-mapped ``ClueArchive`` only row numbers are kept and matches
+are read back with ``ClueArchive.clue(row)``, so the corpus itself stays in
+the page cache shared by every worker.
+"""
+import bisect
+import math
+import re
+import threading
+
+import numpy as np
+
+from clue_source import get_clue_source
+from normalize import fold
+from strikeamatch import _get_character_pairs
+
+MATCH_THRESHOLD = 0.8
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def _search_text(text):
+    return " ".join(_NON_WORD.sub(" ", fold(text or "")).split())
+
+
+class ClueSearchIndex(object):
+    """Character-pair inverted index over clue texts, plus category completion.
+
+    ``clues`` is an iterable of clue dicts, or a source with a ``clue(row)``
+    lookup (``ClueArchive``), which is then kept instead of the clues.
+    """
+
+    def __init__(self, clues=()):
+        self._source = clues if hasattr(clues, "clue") else None
+        self._clues = []
+        postings = {}
+        sizes = []
+        categories = {}
+        for clue_id, clue in enumerate(clues):
+            if self._source is None:
+                self._clues.append(clue)
+            pairs = _get_character_pairs(_search_text(clue["clue"]))
+            sizes.append(len(pairs))
+            for pair in pairs:
+                postings.setdefault(pair, []).append(clue_id)
+            if clue["category"]:
+                categories.setdefault(clue["category"].strip(), 0)
+                categories[clue["category"].strip()] += 1
+        self._postings = {pair: np.array(ids, dtype=np.uint32) for pair, ids in postings.items()}
+        self._sizes = np.array(sizes, dtype=np.float32)
+        self.category_counts = categories
+        self._completions = sorted(
+            (suffix, name)
+            for name in categories
+            for suffix in self._suffixes(name))
+        self._keys = [suffix for suffix, _ in self._completions]
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def _clue(self, clue_id):
+        return self._source.clue(clue_id) if self._source is not None else self._clues[clue_id]
+
+    @staticmethod
+    def _suffixes(name):
+        words = _search_text(name).split()
+        return {" ".join(words[i:]) for i in range(len(words))}
+
+    def search(self, text, limit=5, threshold=0.0):
+        """Best ``(score, clue)`` matches for ``text`` scoring at least ``threshold``.
+
+        With a threshold only clues sharing one of the query's rarest pairs
+        are scored, which skips most of the corpus.
+        >>> index = ClueSearchIndex([
+        ...     {"clue": "This Liverpool band recorded Abbey Road", "category": "ROCK", "response": "The Beatles"},
+        ...     {"clue": "This river flows through Cairo", "category": "RIVERS", "response": "The Nile"}])
+        >>> [(round(s, 2), c["response"]) for s, c in index.search("this liverpool band recorded abbey road!", 1)]
+        [(1.0, 'The Beatles')]
+        """
+        pairs = _get_character_pairs(_search_text(text))
+        known = sorted((p for p in pairs if p in self._postings), key=lambda p: len(self._postings[p]))
+        if not known:
+            return []
+        prefix = known
+        if threshold > 0:
+            # Dice >= t needs at least m = t*q/(2-t) shared pairs, so every such
+            # clue holds one of the len(known) - m + 1 rarest query pairs
+            need = math.ceil(threshold * len(pairs) / (2 - threshold))
+            if need > len(known):
+                return []
+            prefix = known[:len(known) - need + 1]
+        if len(prefix) < len(known) and sum(len(self._postings[p]) for p in prefix) < len(self) // 4:
+            ids = np.unique(np.concatenate([self._postings[p] for p in prefix]))
+            overlap = np.zeros(len(ids), dtype=np.float32)
+            for pair in known:
+                postings = self._postings[pair]
+                pos = np.minimum(np.searchsorted(postings, ids), len(postings) - 1)
+                overlap += postings[pos] == ids
+        else:
+            ids = np.arange(len(self))
+            overlap = np.bincount(np.concatenate([self._postings[p] for p in known]),
+                                  minlength=len(self))
+        scores = 2.0 * overlap / (len(pairs) + self._sizes[ids])
+        limit = min(limit, len(scores))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[i]), self._clue(int(ids[i]))) for i in best if scores[i] >= threshold]
+
+    def match(self, text, threshold=MATCH_THRESHOLD):
+        """The archive clue ``text`` most likely is, or None below ``threshold``."""
+        found = self.search(text, 1, threshold)
+        return found[0][1] if found else None
+
+    def complete_category(self, prefix, limit=10):
+        """Category names with a word starting with ``prefix``, most clues first.
+        >>> index = ClueSearchIndex([{"clue": "x", "category": c, "response": "y"}
+        ...                          for c in ("WORLD HISTORY", "HISTORY OF ROCK", "POTENT POTABLES")])
+        >>> index.complete_category("hist")
+        ['HISTORY OF ROCK', 'WORLD HISTORY']
+        """
+        prefix = _search_text(prefix)
+        if not prefix:
+            return []
+        names = []
+        start = bisect.bisect_left(self._keys, prefix)
+        for suffix, name in self._completions[start:]:
+            if not suffix.startswith(prefix):
+                break
+            if name not in names:
+                names.append(name)
+        names.sort(key=lambda name: (-self.category_counts[name], name))
+        return names[:limit]
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Returns the process-wide index over the clue source, built on first use.
+
+    For the remote cluebase source only the clues remembered so far are
+    indexed, so the index is rebuilt once that store has grown.
+    """
+    global _search_index
+    with _search_index_lock:
+        source = get_clue_source()
+        store = getattr(source, "fallback", source)
+        try:
+            size = len(store)
+        except TypeError:
+            size = 0
+        if _search_index is None or (store is not source and size >= 2 * max(len(_search_index), 100)):
+            _search_index = ClueSearchIndex(store if size else ())
+    return _search_index
@@ -0,0 +1,58 @@
+"""Runs several app workers on consecutive ports that share one cache directory.
+
+    python serve.py --workers 4 --port 8501 --cache-dir .jeopardy_cache
+
+Each worker is a separate ``streamlit run`` process with its own LLM clients,
+but clues fetched from cluebase and LLM/agent responses are kept in the shared
+SQLite caches (see shared_cache.py), so a warm cache in one worker is warm in
+all of them.  Put a load balancer with sticky sessions in front of the ports:
+a Streamlit session lives on one worker's websocket.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from shared_cache import SHARED_CACHE_ENV
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def start_workers(workers, port, cache_dir, app="Contestant_vs_Archive.py", extra_args=()):
+    env = dict(os.environ)
+    env[SHARED_CACHE_ENV] = os.path.abspath(cache_dir)
+    os.makedirs(env[SHARED_CACHE_ENV], exist_ok=True)
+    procs = []
+    for i in range(workers):
+        cmd = [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, app),
+               "--server.port", str(port + i), "--server.headless", "true", *extra_args]
+        procs.append(subprocess.Popen(cmd, cwd=ROOT, env=env))
+        print(f"worker {i} (pid {procs[-1].pid}) on port {port + i}")
+    return procs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--cache-dir", default=".jeopardy_cache")
+    args, extra = parser.parse_known_args(argv)
+
+    procs = start_workers(args.workers, args.port, args.cache_dir, extra_args=extra)
+    try:
+        while all(proc.poll() is None for proc in procs):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+        for proc in procs:
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
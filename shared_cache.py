@@ -0,0 +1,111 @@
+"""Caches shared by every app worker on a host (multi-process server mode).
+
+Set ``JEOPARDY_SHARED_CACHE`` to a directory (``serve.py`` does this for the
+workers it starts) and each worker keeps its clue and response caches in
+SQLite files there instead of in process memory:
+
+* ``clues.sqlite`` - every clue fetched from cluebase by any worker, so one
+  worker's prefetching warms the others and all of them keep serving clues
+  while cluebase is down;
+* ``responses.sqlite`` - the LLM/agent response cache (see response_cache.py).
+
+SQLite in WAL mode lets any number of readers proceed alongside one writer, so
+workers never block each other on lookups.
+"""
+import os
+import sqlite3
+import threading
+
+from clue_source import ClueSource, _key
+
+SHARED_CACHE_ENV = "JEOPARDY_SHARED_CACHE"
+
+
+def shared_cache_path(name):
+    """Path of ``name`` inside the shared cache directory, or None when unset."""
+    directory = os.environ.get(SHARED_CACHE_ENV)
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SharedClueStore(ClueSource):
+    """Clue store in a SQLite file that several processes read and append to.
+
+    Filters hit the ``(difficulty, category_key)`` and ``category_key``
+    indexes; a random draw shuffles only the matching rows, which the prefetch
+    source's cap on remembered clues keeps small.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS clues ("
+                         "id TEXT, category TEXT, category_key TEXT, clue TEXT NOT NULL, "
+                         "response TEXT, value TEXT, difficulty INTEGER, "
+                         "UNIQUE (category_key, clue))")
+            conn.execute("CREATE INDEX IF NOT EXISTS clues_difficulty "
+                         "ON clues(difficulty, category_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS clues_category ON clues(category_key)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM clues").fetchone()[0]
+
+    def __iter__(self):
+        rows = self._connect().execute(
+            "SELECT id, category, clue, response, value, difficulty FROM clues ORDER BY rowid")
+        return (self._clue(row) for row in rows)
+
+    @staticmethod
+    def _clue(row):
+        return dict(zip(("id", "category", "clue", "response", "value", "difficulty"), row))
+
+    def add(self, clue):
+        self.add_many([clue])
+
+    def add_many(self, clues):
+        """Appends clues in one transaction; duplicates are ignored."""
+        rows = [(None if c["id"] is None else str(c["id"]), c["category"],
+                 _key(None, c["category"] or "")[1], c["clue"], c["response"],
+                 None if c["value"] is None else str(c["value"]), c["difficulty"])
+                for c in clues if c.get("clue")]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO clues VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def random_clue(self, difficulty=None, category=None):
+        clues = self.random_clues(1, difficulty, category)
+        return clues[0] if clues else None
+
+    def random_clues(self, n, difficulty=None, category=None):
+        difficulty, category = _key(difficulty, category)
+        where, params = [], []
+        if difficulty is not None:
+            where.append("difficulty = ?")
+            params.append(difficulty)
+        if category is not None:
+            where.append("category_key = ?")
+            params.append(category)
+        sql = "SELECT id, category, clue, response, value, difficulty FROM clues"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._connect().execute(sql + " ORDER BY RANDOM() LIMIT ?", params + [n])
+        clues = [self._clue(row) for row in rows]
+        for clue in clues:
+            if clue["value"] is not None and clue["value"].isdigit():
+                clue["value"] = int(clue["value"])
+        return clues
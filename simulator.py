@@ -0,0 +1,152 @@
+"""Headless tournament simulator and benchmark harness.
+
+Plays many games of each mode with scripted contestants and a stub LLM, using
+the same clue fetching, answer grading and scoring code as the pages, and
+reports games/sec, per-phase latency and score distributions.
+
+    python simulator.py --games 2000
+    python simulator.py --games 500 --dump clues.jca --llm-latency 0.01
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from clue_source import LocalClueStore, make_clue, set_clue_source
+from game_engine import GameState, grade_response, is_game_over, record_answer
+from prompts import render
+from question_pool import QuestionPool
+from stub_llm import StubLLM
+from utils import generate_question_from_archive
+
+MODES = ("contestant_vs_archive", "contestant_vs_chatgpt", "chatgpt_vs_archive", "chatgpt_vs_world")
+PHASES = ("fetch", "answer", "grade")
+
+_WORDS = ("river", "queen", "atomic", "jazz", "volcano", "empire", "comet", "opera",
+          "harbor", "falcon", "prairie", "sonnet", "glacier", "tango", "nebula", "canyon")
+
+
+def synthetic_store(n=5000, seed=0):
+    """A throwaway clue corpus so simulations need no dump or network."""
+    rng = random.Random(seed)
+    clues = []
+    for i in range(n):
+        answer = " ".join(rng.choice(_WORDS).title() for _ in range(rng.randint(1, 3)))
+        clues.append(make_clue({
+            "id": i,
+            "category": f"{rng.choice(_WORDS).upper()} & {rng.choice(_WORDS).upper()}",
+            "clue": f"Clue {i}: this is {' '.join(rng.choice(_WORDS) for _ in range(8))}",
+            "response": answer,
+            "value": rng.choice((200, 400, 600, 800, 1000)),
+        }))
+    return LocalClueStore(clues)
+
+
+class ScriptedContestant(object):
+    """Answers correctly with probability ``skill``, otherwise guesses a random word."""
+
+    def __init__(self, skill=0.6, seed=None):
+        self.skill = skill
+        self._random = random.Random(seed)
+
+    def __call__(self, answer):
+        if self._random.random() < self.skill:
+            return answer.lower() if self._random.random() < 0.5 else answer.split()[-1]
+        return self._random.choice(_WORDS)
+
+
+class Simulator(object):
+    def __init__(self, store, skill=0.6, llm_accuracy=0.7, llm_latency=0.0, totq=6, seed=0):
+        self.store = store
+        self.totq = totq
+        set_clue_source(store)
+        answers = {c["clue"]: c["response"] for c in store}
+        self.contestant = ScriptedContestant(skill, seed)
+        self.llm = StubLLM(answers, accuracy=llm_accuracy, latency=llm_latency, jitter=0, seed=seed)
+        self.pool = QuestionPool(self._generate, depth=32, low_water=8)
+        self.timings = defaultdict(list)
+
+    def _generate(self, k, difficulty, category):
+        # Stub for ChatGPT question generation: sample the store at LLM speed
+        clues = [self.store.random_clue(difficulty, category) for _ in range(k)]
+        for clue in clues:
+            self.llm(render("answer", category=clue["category"], clue=clue["clue"]))
+        return [[c["category"], c["clue"], c["response"], c["value"]] for c in clues]
+
+    def _timed(self, phase, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.timings[phase].append(time.perf_counter() - start)
+        return result
+
+    def play(self, mode):
+        state = GameState(self.totq)
+        while not is_game_over(state):
+            if mode == "contestant_vs_chatgpt":
+                category, clue, answer, value = self._timed("fetch", self.pool.get, None, None)
+            else:
+                category, clue, answer, value = self._timed("fetch", generate_question_from_archive, None, None)
+
+            if mode.startswith("contestant"):
+                response = self._timed("answer", self.contestant, answer)
+            else:
+                prompt = render("answer", category=category, clue=clue)
+                response = self._timed("answer", self.llm, prompt)
+
+            correct = self._timed("grade", grade_response, response, answer)
+            if mode == "chatgpt_vs_world":
+                # Final round: the contestant scores when ChatGPT gets it wrong
+                correct = not correct
+            record_answer(state, correct, int(value))
+        return state
+
+    def run(self, mode, games):
+        self.timings.clear()
+        start = time.perf_counter()
+        scores = [self.play(mode).points for _ in range(games)]
+        elapsed = time.perf_counter() - start
+        return elapsed, scores, {p: list(self.timings[p]) for p in PHASES}
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def report(mode, games, elapsed, scores, timings):
+    print(f"== {mode}: {games} games in {elapsed:.2f}s ({games / elapsed:,.0f} games/s)")
+    for phase in PHASES:
+        t = timings[phase]
+        print(f"   {phase:>6}: mean {statistics.fmean(t) * 1e6:9.1f} us  "
+              f"p50 {_percentile(t, 0.5) * 1e6:9.1f} us  p95 {_percentile(t, 0.95) * 1e6:9.1f} us")
+    print(f"   scores: mean {statistics.fmean(scores):8.1f}  stdev {statistics.pstdev(scores):8.1f}  "
+          f"min {min(scores)}  p50 {_percentile(scores, 0.5)}  max {max(scores)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--mode", choices=MODES, action="append")
+    parser.add_argument("--dump", help="CSV/JSONL clue dump or .jca archive (default: synthetic)")
+    parser.add_argument("--skill", type=float, default=0.6, help="scripted contestant accuracy")
+    parser.add_argument("--llm-accuracy", type=float, default=0.7)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stub LLM seconds per call")
+    parser.add_argument("--totq", type=int, default=6)
+    args = parser.parse_args(argv)
+
+    if args.dump and args.dump.endswith(".jca"):
+        from clue_archive import ClueArchive
+        store = ClueArchive(args.dump)
+    elif args.dump:
+        store = LocalClueStore.load(args.dump)
+    else:
+        store = synthetic_store()
+
+    sim = Simulator(store, args.skill, args.llm_accuracy, args.llm_latency, args.totq)
+    for mode in args.mode or MODES:
+        report(mode, args.games, *sim.run(mode, args.games))
+
+
+if __name__ == "__main__":
+    main()
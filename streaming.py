@@ -0,0 +1,147 @@
+"""Incremental rendering of streamed LLM tokens.
+
+Imported lazily by the pages (it pulls in langchain) right before a call.
+"""
+import time
+
+from langchain.callbacks.base import BaseCallbackHandler
+
+from instrumentation import inc, metrics
+
+FINAL_ANSWER = "Final Answer:"
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """Writes tokens into a Streamlit placeholder as they arrive.
+
+    For an agent (``agent=True``) only the text after ``Final Answer:`` is
+    shown; the reasoning steps are left to ``ReasoningHandler``.
+    ``on_final_answer(answer)`` fires once, as soon as the answer line is
+    complete, so grading does not wait for the run to wind down.
+
+    ``placeholder`` is anything with a ``write(text)``: a Streamlit
+    placeholder, or a task's ``Progress`` when the call runs in the background.
+    """
+
+    def __init__(self, placeholder, prefix="ChatGPT response: ", agent=False, on_final_answer=None):
+        self.placeholder = placeholder
+        self.prefix = prefix
+        self.agent = agent
+        self.on_final_answer = on_final_answer
+        self.start = time.perf_counter()
+        self.first_token = None
+        self.end = None
+        self.final_answer = None
+        self._text = ""
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._text = ""
+
+    def on_llm_new_token(self, token, **kwargs):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self._text += token
+        if self.final_answer is not None:
+            return
+        if not self.agent:
+            self.placeholder.write(self.prefix + self._text.lstrip())
+        elif FINAL_ANSWER in self._text:
+            answer = self._text.split(FINAL_ANSWER, 1)[1]
+            self.placeholder.write(self.prefix + answer.strip())
+            if "\n" in answer.lstrip():
+                self._finish(answer.strip().splitlines()[0])
+
+    def on_llm_end(self, response, **kwargs):
+        if self.final_answer is None and (not self.agent or FINAL_ANSWER in self._text):
+            self._finish(self._text.split(FINAL_ANSWER, 1)[-1])
+
+    def finish(self, response):
+        """Call with the run's return value; covers cached or non-streamed responses."""
+        self.end = time.perf_counter()
+        self.placeholder.write(self.prefix + response.strip())
+        if self.final_answer is None:
+            self._finish(response)
+        return self.final_answer
+
+    def _finish(self, answer):
+        self.final_answer = answer.strip()
+        if self.on_final_answer is not None:
+            self.on_final_answer(self.final_answer)
+
+    def usage(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "time_to_first_token": (self.first_token or end) - self.start,
+            "total_latency": end - self.start,
+        }
+
+
+class ReasoningHandler(BaseCallbackHandler):
+    """Streams an agent's thoughts, actions and tool observations.
+
+    ``write(text)`` gets the whole log so far after every token and every
+    tool result.  Unlike ``StreamlitCallbackHandler`` it touches no Streamlit
+    elements, so it also works from a background task.
+    """
+
+    def __init__(self, write):
+        self.write = write
+        self._log = ""
+        self._text = ""
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._text = ""
+
+    def on_llm_new_token(self, token, **kwargs):
+        self._text += token
+        self.write((self._log + self._text).strip())
+
+    def on_llm_end(self, response, **kwargs):
+        if not self._text:
+            # Not streamed
+            self._text = response.generations[0][0].text
+        self._log += self._text.strip() + "\n"
+        self._text = ""
+        self.write(self._log.strip())
+
+    def on_tool_end(self, output, **kwargs):
+        self._log += f"Observation: {str(output).strip()}\n"
+        self.write(self._log.strip())
+
+
+class ToolTimingHandler(BaseCallbackHandler):
+    """Times each agent tool step into the ``agent_tool`` histogram.
+
+    ``steps`` keeps ``{"tool", "input", "seconds"}`` per step of this run for
+    the usage panel.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self._started = []
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self._started.append((serialized.get("name", "unknown"), input_str, time.perf_counter()))
+
+    def _end(self):
+        if not self._started:
+            return None
+        name, input_str, start = self._started.pop()
+        seconds = time.perf_counter() - start
+        metrics.observe("agent_tool", seconds, tool=name)
+        self.steps.append({"tool": name, "input": input_str, "seconds": round(seconds, 3)})
+        return name
+
+    def on_tool_end(self, output, **kwargs):
+        self._end()
+
+    def on_tool_error(self, error, **kwargs):
+        name = self._end()
+        if name is not None:
+            inc("agent_tool_errors", tool=name)
+
+
+def record_usage(cb, model):
+    """Adds a ``get_openai_callback()`` total to the token and cost counters."""
+    inc("llm_tokens", getattr(cb, "total_tokens", 0), model=model)
+    inc("llm_cost_usd", getattr(cb, "total_cost", 0.0), model=model)
@@ -0,0 +1,55 @@
+import asyncio
+import random
+import re
+import time
+
+_CLUE = re.compile(r'The clue is "(.*?)"\.?', re.S)
+
+
+class StubLLM(object):
+    """Offline stand-in for a langchain LLM.
+
+    Answers Jeopardy prompts from a clue -> answer map with a configurable
+    hit rate and simulated latency, so batch runs and benchmarks can be timed
+    without network access.  Call it like a langchain LLM: ``llm(prompt)``.
+    """
+
+    def __init__(self, answers=None, accuracy=0.7, latency=0.05, jitter=0.5,
+                 model_name="stub", seed=None):
+        self.answers = dict(answers or {})
+        self.accuracy = accuracy
+        self.latency = latency
+        self.jitter = jitter
+        self.model_name = model_name
+        self.temperature = 0
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _delay(self):
+        return self.latency * (1 + self.jitter * (2 * self._random.random() - 1))
+
+    def learn(self, clue, answer):
+        """Teaches the stub the answer to ``clue`` (it still misses at 1 - accuracy)."""
+        self.answers[clue] = answer
+
+    def _answer(self, prompt):
+        self.calls += 1
+        clues = _CLUE.findall(prompt)
+        if len(clues) > 1:
+            # A packed prompt (see prompts.pack): one numbered answer line per clue
+            return "\n".join(f"{i}. {self._answer_clue(clue)}" for i, clue in enumerate(clues, 1))
+        return self._answer_clue(clues[0] if clues else None)
+
+    def _answer_clue(self, clue):
+        answer = self.answers.get(clue)
+        if answer is not None and self._random.random() < self.accuracy:
+            return answer
+        return "I don't know"
+
+    def __call__(self, prompt, **kwargs):
+        time.sleep(self._delay())
+        return self._answer(prompt)
+
+    async def acall(self, prompt, **kwargs):
+        await asyncio.sleep(self._delay())
+        return self._answer(prompt)
@@ -0,0 +1,193 @@
+"""Runs slow page work (clue fetches, LLM calls) off the Streamlit script thread.
+
+A page submits the call as a named task in its session state and carries on
+rendering.  While the task is pending the page shows a placeholder (plus any
+partial output the task has written to ``task.progress``) and asks for another
+rerun shortly after; the rerun that finds the task done picks up its result.
+So every rerun takes a bounded time however slow the upstream is.
+
+    submit(st.session_state, "question", (game_id, nq), fetch_question, ...)
+    question = collect(st.session_state, "question")
+    if question is PENDING:
+        ...
+
+Submitting a task with the same name and key as one that is still pending or
+not yet collected (a double click, a callback racing a rerun) returns that
+task instead of starting the call again.  A different key replaces the task;
+the old call finishes in the background and its result is dropped.  Until it
+has, both calls may run at once, so anything they share (a session's clue
+queue) needs a lock.
+
+Task functions run on a shared thread pool and must not touch
+``st.session_state`` or Streamlit elements: pass them plain values and
+objects, and let them report partial output through ``task.progress``.
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from instrumentation import inc
+
+TASK_WORKERS_ENV = "JEOPARDY_TASK_WORKERS"
+
+# Returned by ``collect`` while the task is still running
+PENDING = object()
+
+
+class Progress(object):
+    """Partial output of a task, written by its thread and read by reruns.
+
+    ``write`` (the response so far) has the signature of a Streamlit
+    placeholder's; ``write_reasoning`` takes an agent's reasoning so far and
+    ``finish`` the final answer as soon as it is known.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.reasoning = ""
+        self.answer = None
+
+    def write(self, text):
+        self.text = text
+
+    def write_reasoning(self, text):
+        self.reasoning = text
+
+    def finish(self, answer):
+        self.answer = answer
+
+
+class Task(object):
+    __slots__ = ("key", "future", "started", "progress", "rerun_done")
+
+    def __init__(self, key, future, progress):
+        self.key = key
+        self.future = future
+        self.started = time.perf_counter()
+        self.progress = progress
+        # Set once a rerun has been requested for the finished task
+        self.rerun_done = False
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+class TaskRunner(object):
+    """Thread pool shared by every session, plus process-wide background values."""
+
+    def __init__(self, workers=16):
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="task")
+        self._lock = threading.Lock()
+        self._shared = {}
+        self.submitted = 0
+        self.coalesced = 0
+
+    def submit(self, tasks, name, key, fn, *args, progress=None, **kwargs):
+        """Starts ``fn(*args, **kwargs)`` as task ``name`` in the ``tasks`` dict, unless it is already there."""
+        with self._lock:
+            task = tasks.get(name)
+            if task is not None and task.key == key:
+                self.coalesced += 1
+                inc("tasks_coalesced", task=name)
+                return task
+            self.submitted += 1
+            task = Task(key, self._executor.submit(fn, *args, **kwargs), progress)
+            tasks[name] = task
+        inc("tasks_submitted", task=name)
+        return task
+
+    def shared(self, name, fn, max_age=None):
+        """Latest result of the process-wide call ``fn()``, or None until the first one is done.
+
+        The call is started on first use, again after it failed and, with
+        ``max_age``, again in the background once the result is that many
+        seconds old; the previous result keeps being served meanwhile.
+        """
+        with self._lock:
+            entry = self._shared.get(name)
+            if entry is not None and entry["future"].done():
+                failed = entry["future"].exception() is not None
+                if not failed:
+                    entry["value"] = entry["future"].result()
+                stale = max_age is not None and time.monotonic() - entry["at"] > max_age
+            if entry is None or (entry["future"].done() and (failed or stale)):
+                entry = self._shared[name] = {"future": self._executor.submit(fn), "at": time.monotonic(),
+                                              "value": entry and entry["value"]}
+            return entry["value"]
+
+    def stats(self):
+        return {"tasks_submitted": self.submitted, "tasks_coalesced": self.coalesced}
+
+
+_task_runner = None
+_task_runner_lock = threading.Lock()
+
+
+def get_task_runner():
+    """Returns the process-wide task runner (``JEOPARDY_TASK_WORKERS`` threads, default 16)."""
+    global _task_runner
+    with _task_runner_lock:
+        if _task_runner is None:
+            _task_runner = TaskRunner(int(os.environ.get(TASK_WORKERS_ENV, "16")))
+    return _task_runner
+
+
+def _tasks(state):
+    if "tasks" not in state:
+        state["tasks"] = {}
+    return state["tasks"]
+
+
+def submit(state, name, key, fn, *args, progress=None, **kwargs):
+    """Runs ``fn`` in the background as this session's task ``name``; returns the Task."""
+    return get_task_runner().submit(_tasks(state), name, key, fn, *args, progress=progress, **kwargs)
+
+
+def get_task(state, name):
+    """This session's task ``name``, or None."""
+    return _tasks(state).get(name)
+
+
+def discard(state, *names):
+    """Drops this session's tasks ``names``; a running call's result is dropped."""
+    tasks = _tasks(state)
+    for name in names:
+        tasks.pop(name, None)
+
+
+def collect(state, name, timeout=0):
+    """The result of task ``name`` once done (re-raising its error), else PENDING.
+
+    Waits up to ``timeout`` seconds first.  A collected task is removed, so
+    its result is handed out once; None if there is no such task.
+    """
+    tasks = _tasks(state)
+    task = tasks.get(name)
+    if task is None:
+        return None
+    if not task.future.done():
+        wait([task.future], timeout)
+        if not task.future.done():
+            return PENDING
+    del tasks[name]
+    return task.future.result()
+
+
+def rerun_while_pending(state, interval=0.2):
+    """Reruns the page soon if any of this session's tasks is still running.
+
+    Call at the very end of the script.  Waits up to ``interval`` for a task
+    to finish first, so a pending page reruns a few times a second at most.
+    A task that finished after the page looked for it gets one more rerun to
+    be picked up in.
+    """
+    tasks = list(_tasks(state).values())
+    if all(task.rerun_done for task in tasks):
+        return
+    wait([task.future for task in tasks if not task.rerun_done], interval, return_when=FIRST_COMPLETED)
+    for task in tasks:
+        if task.future.done():
+            task.rerun_done = True
+    import streamlit as st
+    st.experimental_rerun()
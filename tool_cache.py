@@ -0,0 +1,98 @@
+"""Caching for agent tool calls (serpapi, wolfram-alpha, ...).
+
+The agents send near-identical searches for the same clue from every session
+("Beatles first album", "beatles first album ").  ``cache_tools`` wraps each
+tool so a call is keyed on the tool name and the normalized query, and
+repeats are answered from memory.  With ``JEOPARDY_SHARED_CACHE`` set they are
+also answered from a SQLite file shared by all workers.  Entries expire after
+a TTL (search results go stale) and the least recently used are evicted
+beyond a size limit.  Failed calls are never cached.
+"""
+import hashlib
+import re
+import threading
+
+from instrumentation import inc, timer
+from response_cache import LRUCache, SQLiteCache
+
+DEFAULT_TTL = 6 * 3600
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """Canonical form of a tool query: case, spacing and wrapping quotes ignored.
+    >>> normalize_query('  "Beatles  First Album"? ')
+    'beatles first album'
+    """
+    query = _SPACES.sub(" ", str(query)).strip().casefold()
+    return query.rstrip("?.!").strip("\"'` ")
+
+
+class ToolCache(object):
+    """Memory tier in front of an optional disk tier, keyed on (tool, query)."""
+
+    def __init__(self, maxsize=2048, ttl=DEFAULT_TTL, disk=None):
+        self.memory = LRUCache(maxsize, ttl)
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tool, query):
+        raw = f"{tool}\x1f{normalize_query(query)}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def call(self, tool, query, fn):
+        """Returns ``fn(query)`` for ``tool``, from the cache when possible."""
+        key = self.key(tool, query)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            inc("tool_cache_hits", tool=tool)
+            return value
+        with self._lock:
+            self.misses += 1
+        with timer("tool_call", tool=tool):
+            value = fn(query)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        return value
+
+    def stats(self):
+        return {"tool_cache_hits": self.hits, "tool_cache_misses": self.misses}
+
+
+_tool_cache = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache():
+    """Returns the process-wide tool cache (disk tier in the shared cache directory, if set)."""
+    global _tool_cache
+    with _tool_cache_lock:
+        if _tool_cache is None:
+            from shared_cache import shared_cache_path
+            path = shared_cache_path("tools.sqlite")
+            _tool_cache = ToolCache(disk=SQLiteCache(path, ttl=DEFAULT_TTL) if path else None)
+    return _tool_cache
+
+
+def cache_tools(tools, cache=None):
+    """Wraps langchain tools so their calls go through ``cache``."""
+    from langchain.agents import Tool
+
+    cache = cache or get_tool_cache()
+
+    def wrap(tool):
+        return Tool(name=tool.name, description=tool.description,
+                    func=lambda query: cache.call(tool.name, query, tool.run))
+
+    return [wrap(tool) for tool in tools]